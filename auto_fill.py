@@ -0,0 +1,151 @@
+import argparse
+import time
+
+from input_driver import RecordingDriver
+
+# 自動填入方式
+#   mouse:    依列序逐格移動、點擊、輸入（原本的方式，相容性最高）
+#   ordered:  依最短移動路徑排序格子，點擊與移動合併為一次呼叫
+#   keyboard: 只點擊第一格，之後以方向鍵移動並一次送出所有按鍵（遊戲需支援方向鍵移動選取格）
+FILL_MODES = ('mouse', 'ordered', 'keyboard')
+DEFAULT_FILL_MODE = 'ordered'
+
+
+def fill_delay(speed_value):
+    """將速度滑塊值（1~10）換算為每次操作的延遲秒數，範圍0.3 ~ 0.001秒"""
+    return 0.3 * (0.001 / 0.3) ** ((speed_value - 1) / 9)
+
+
+def empty_cells(initial_grid):
+    """返回需要填入的格子座標（列序）"""
+    return [(i, j) for i in range(9) for j in range(9) if initial_grid[i][j] == 0]
+
+
+def fill_order(cells, start=None):
+    """以最近鄰方式排序格子，讓滑鼠移動距離或方向鍵次數盡量少"""
+    remaining = list(cells)
+    if not remaining:
+        return []
+    current = start if start is not None else remaining[0]
+    order = []
+    while remaining:
+        # 以曼哈頓距離（等於方向鍵次數）選擇最近的格子，距離相同時取列序較前者
+        nearest = min(remaining, key=lambda cell: (abs(cell[0] - current[0]) + abs(cell[1] - current[1]), cell))
+        remaining.remove(nearest)
+        order.append(nearest)
+        current = nearest
+    return order
+
+
+def navigation_keys(order, solution_grid):
+    """產生從第一格開始，以方向鍵移動並輸入數字的完整按鍵序列"""
+    keys = []
+    current = None
+    for i, j in order:
+        if current is not None:
+            di, dj = i - current[0], j - current[1]
+            keys += ['down' if di > 0 else 'up'] * abs(di)
+            keys += ['right' if dj > 0 else 'left'] * abs(dj)
+        keys.append(str(solution_grid[i][j]))
+        current = (i, j)
+    return keys
+
+
+def fill_mouse(driver, cells, solution_grid, cell_center):
+    """原本的填入方式：每格移動、點擊、輸入各一次"""
+    for i, j in cells:
+        x, y = cell_center(i, j)
+        driver.moveTo(x, y + 2)
+        driver.click()
+        driver.write(str(solution_grid[i][j]))
+
+
+def fill_ordered(driver, cells, solution_grid, cell_center):
+    """依最短路徑排序後點擊並輸入，每格只需兩次操作"""
+    for i, j in fill_order(cells):
+        x, y = cell_center(i, j)
+        driver.click(x, y + 2)
+        driver.write(str(solution_grid[i][j]))
+
+
+def fill_keyboard(driver, cells, solution_grid, cell_center, interval=0.0):
+    """點擊第一格後，以方向鍵導覽一次送出所有按鍵"""
+    order = fill_order(cells)
+    if not order:
+        return
+    x, y = cell_center(*order[0])
+    driver.click(x, y + 2)
+    driver.press(navigation_keys(order, solution_grid), interval=interval)
+
+
+def fill_solution(driver, initial_grid, solution_grid, cell_center, mode=DEFAULT_FILL_MODE, delay=0.0):
+    """以指定方式填入答案，返回實際耗時（秒）
+
+    driver 為 InputDriver（input_driver.py），cell_center(i, j) 返回格子中心的螢幕座標。
+    """
+    if mode not in FILL_MODES:
+        raise ValueError(f"未知的填入方式: {mode}，可用: {', '.join(FILL_MODES)}")
+    cells = empty_cells(initial_grid)
+    start = time.perf_counter()
+    if mode == 'mouse':
+        fill_mouse(driver, cells, solution_grid, cell_center)
+    elif mode == 'ordered':
+        fill_ordered(driver, cells, solution_grid, cell_center)
+    else:
+        fill_keyboard(driver, cells, solution_grid, cell_center, interval=delay)
+    return time.perf_counter() - start
+
+
+def benchmark_fill(puzzles, modes=FILL_MODES, speeds=range(1, 11), area=(0, 0, 450, 450), solver_name='dlx'):
+    """以RecordingDriver在無顯示環境比較各填入方式與速度值，返回每個組合的平均事件數與模擬耗時"""
+    from solver import create_solver
+    x1, y1, x2, y2 = area
+    cell_w, cell_h = (x2 - x1) / 9, (y2 - y1) / 9
+
+    def cell_center(i, j):
+        return int(x1 + cell_w * j + cell_w / 2), int(y1 + cell_h * i + cell_h / 2)
+
+    boards = []
+    for puzzle in puzzles:
+        solution = [row[:] for row in puzzle]
+        if create_solver(solver_name).solve(solution):
+            boards.append((puzzle, solution))
+
+    rows = []
+    for mode in modes:
+        for speed in speeds:
+            delay = fill_delay(speed)
+            driver = RecordingDriver(pause=delay)
+            events = keys = 0
+            simulated = 0.0
+            for puzzle, solution in boards:
+                driver.reset()
+                fill_solution(driver, puzzle, solution, cell_center, mode=mode, delay=delay)
+                counts = driver.counts()
+                events += len(driver.events)
+                keys += counts.get('keys', 0)
+                simulated += driver.simulated_time
+            n = max(len(boards), 1)
+            rows.append({'mode': mode, 'speed': speed, 'delay': delay, 'puzzles': len(boards),
+                         'events': events / n, 'keys': keys / n, 'fill_time': simulated / n})
+    return rows
+
+
+def main():
+    from solver import parse_puzzle, read_puzzles
+    parser = argparse.ArgumentParser(description="在無顯示環境比較各自動填入方式的事件數與耗時")
+    parser.add_argument('puzzles', help="題目檔，每行81字元，0或.表示空格")
+    parser.add_argument('--modes', nargs='*', default=list(FILL_MODES), choices=FILL_MODES, help="填入方式")
+    parser.add_argument('--speeds', nargs='*', type=float, default=[1, 4, 7, 10], help="速度滑塊值（1~10）")
+    args = parser.parse_args()
+
+    with open(args.puzzles, encoding='utf-8') as f:
+        puzzles = [parse_puzzle(line) for line in read_puzzles(f)]
+    print(f"{'方式':<10}{'速度':>6}{'延遲(秒)':>10}{'事件數':>8}{'按鍵數':>8}{'填入耗時(秒)':>14}")
+    for row in benchmark_fill(puzzles, args.modes, args.speeds):
+        print(f"{row['mode']:<10}{row['speed']:>6g}{row['delay']:>10.4f}{row['events']:>8.1f}"
+              f"{row['keys']:>8.1f}{row['fill_time']:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+
+from solver import SOLVERS, DEFAULT_SOLVER, create_solver, parse_puzzle, format_grid, read_puzzles
+
+IN_FLIGHT_CHUNKS = 4                       # 每個進程同時最多分配的批次數
+
+
+def solve_one(puzzle, solver_name=DEFAULT_SOLVER):
+    """解一道題目（81字元字串或9x9網格），返回81字元解答，無解或格式錯誤時返回None"""
+    try:
+        grid = parse_puzzle(puzzle) if isinstance(puzzle, str) else [row[:] for row in puzzle]
+    except ValueError:
+        return None
+    if create_solver(solver_name).solve(grid):
+        return format_grid(grid)
+    return None
+
+
+def solve_many(puzzles, solver_name=DEFAULT_SOLVER, processes=None, chunksize=64):
+    """以多進程池批次解題，依輸入順序逐一產生解答（無解為None）
+
+    puzzles 可以是任意可迭代物件（例如檔案物件）。Pool.imap會立即讀完整個輸入，因此每次只取
+    processes*chunksize*IN_FLIGHT_CHUNKS 道題目交給進程池，記憶體用量不隨檔案大小增加。
+    processes=1 時直接在目前進程中求解。
+    """
+    worker = partial(solve_one, solver_name=solver_name)
+    if processes == 1:
+        yield from map(worker, puzzles)
+        return
+    puzzles = iter(puzzles)
+    block_size = (processes or os.cpu_count() or 1) * chunksize * IN_FLIGHT_CHUNKS
+    with Pool(processes) as pool:
+        while True:
+            block = list(islice(puzzles, block_size))
+            if not block:
+                break
+            yield from pool.imap(worker, block, chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批次解數獨（每行一題，81字元，0或.表示空格）")
+    parser.add_argument('input', nargs='?', default='-', help="題目檔案，省略或'-'表示stdin")
+    parser.add_argument('-o', '--output', default='-', help="解答輸出檔案，省略或'-'表示stdout")
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(), help="進程數量")
+    parser.add_argument('--chunksize', type=int, default=64, help="每次分派給進程的題目數")
+    parser.add_argument('--solver', default=DEFAULT_SOLVER, choices=list(SOLVERS), help="解題引擎")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="先以NumPy向量化推導整批題目，只有需要搜尋的題目才交給解題引擎")
+    parser.add_argument('--batch-size', type=int, default=65536, help="向量化模式每批題目數")
+    args = parser.parse_args()
+
+    src = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    dst = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    count = failed = 0
+    start = time.perf_counter()
+    if args.vectorized:
+        from vector_solver import solve_bulk
+        solutions = solve_bulk(read_puzzles(src), args.solver, args.batch_size, args.processes)
+    else:
+        solutions = solve_many(read_puzzles(src), args.solver, args.processes, args.chunksize)
+    try:
+        for solution in solutions:
+            # 無解的題目輸出空行，保持與輸入逐行對應
+            dst.write((solution or '') + '\n')
+            count += 1
+            failed += solution is None
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"完成 {count} 題（無解 {failed} 題），耗時 {elapsed:.3f} 秒，{rate:.1f} 題/秒", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
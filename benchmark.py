@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from solver import SOLVERS, create_solver, count_solutions, parse_puzzle
+from auto_fill import FILL_MODES, fill_delay, fill_solution
+from input_driver import RecordingDriver
+from pipeline import MODEL_BACKENDS, DEFAULT_BACKEND
+#端到端效能測試：解題、唯一解檢查、格子映射、辨識與自動填入各階段的延遲分布
+
+BENCHMARK_DIR = os.path.join('datasets', 'benchmark')
+PUZZLE_FILE = os.path.join(BENCHMARK_DIR, 'puzzles.txt')
+IMAGE_DIR = os.path.join(BENCHMARK_DIR, 'images')
+IMAGE_MANIFEST = os.path.join(BENCHMARK_DIR, 'images.txt')
+LEVELS = ('easy', 'medium', 'hard', 'hardest')
+BOARD_SIZE = 450                           # 範例題目圖片邊長（像素）
+
+
+def load_corpus(path=PUZZLE_FILE):
+    """讀取題庫，返回[(難度, 名稱, 9x9網格)]"""
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            level, name, puzzle = line.split()
+            corpus.append((level, name, parse_puzzle(puzzle)))
+    return corpus
+
+
+def load_images(path=IMAGE_MANIFEST):
+    """讀取範例圖片清單，返回[(圖片路徑, 9x9正確網格)]"""
+    if not os.path.exists(path):
+        return []
+    images = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            filename, puzzle = line.split()
+            images.append((os.path.join(os.path.dirname(path), filename), parse_puzzle(puzzle)))
+    return images
+
+
+def render_board(grid, size=BOARD_SIZE):
+    """將題目繪製成白底黑字的數獨圖片（範例圖片以此產生）"""
+    from PIL import Image, ImageDraw, ImageFont
+    image = Image.new('RGB', (size, size), 'white')
+    draw = ImageDraw.Draw(image)
+    cell = size / 9
+    try:
+        font = ImageFont.load_default(size=int(cell * 0.7))
+    except TypeError:
+        font = ImageFont.load_default()  # Pillow 10.1以前不支援指定大小
+    for k in range(10):
+        width = 3 if k % 3 == 0 else 1
+        pos = round(k * cell)
+        draw.line([(pos, 0), (pos, size)], fill='black', width=width)
+        draw.line([(0, pos), (size, pos)], fill='black', width=width)
+    for i in range(9):
+        for j in range(9):
+            if grid[i][j]:
+                draw.text(((j + 0.5) * cell, (i + 0.5) * cell), str(grid[i][j]), fill='black',
+                          font=font, anchor='mm')
+    return image
+
+
+def make_images(corpus, per_level=2, directory=IMAGE_DIR, manifest=IMAGE_MANIFEST):
+    """從題庫每個難度取前幾題繪製範例圖片，並寫出圖片清單"""
+    os.makedirs(directory, exist_ok=True)
+    lines = ["# 範例題目圖片：每行為「圖片路徑 正確題目」，路徑相對於本檔案"]
+    for level in LEVELS:
+        for _, name, grid in [entry for entry in corpus if entry[0] == level][:per_level]:
+            filename = f"{name}.png"
+            render_board(grid).save(os.path.join(directory, filename))
+            lines.append(f"{os.path.basename(directory)}/{filename} {''.join(str(n) for row in grid for n in row)}")
+    with open(manifest, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return len(lines) - 1
+
+
+def percentile(sorted_values, q):
+    """以最近序位法計算百分位數"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies):
+    """將延遲列表（秒）整理為統計結果，時間單位為毫秒"""
+    values = sorted(latencies)
+    total = sum(values)
+    return {
+        'count': len(values),
+        'mean_ms': total / len(values) * 1000 if values else 0.0,
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': values[-1] * 1000 if values else 0.0,
+        'per_sec': len(values) / total if total else 0.0,
+    }
+
+
+def timed(func, *args):
+    """執行一次並返回(結果, 耗時秒數)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_solvers(corpus, solver_names, repeat):
+    """解題階段：每個引擎、每個難度的單題延遲"""
+    stages = {}
+    for name in solver_names:
+        for level in LEVELS:
+            grids = [grid for lvl, _, grid in corpus if lvl == level]
+            if not grids:
+                continue
+            for grid in grids:
+                create_solver(name).solve([row[:] for row in grid])  # 預熱，不計時
+            latencies = []
+            for _ in range(repeat):
+                for grid in grids:
+                    solved, elapsed = timed(create_solver(name).solve, [row[:] for row in grid])
+                    if not solved:
+                        raise RuntimeError(f"{name} 無法解出 {level} 題目")
+                    latencies.append(elapsed)
+            stages[f"solve.{name}.{level}"] = summarize(latencies)
+    return stages
+
+
+def bench_unique_check(corpus, repeat):
+    """唯一解檢查階段（show_result在填入前執行）"""
+    latencies = [timed(count_solutions, grid, 2)[1] for _ in range(repeat) for _, _, grid in corpus]
+    return {'unique_check': summarize(latencies)}
+
+
+def synthetic_detections(grid, rng, cell=BOARD_SIZE / 9):
+    """依正確網格產生模擬的YOLO偵測框（含位置抖動與重複的低信心偵測）"""
+    import numpy as np
+    boxes, classes, confs = [], [], []
+    for i in range(9):
+        for j in range(9):
+            if grid[i][j]:
+                x = (j + 0.5) * cell + rng.uniform(-cell * 0.2, cell * 0.2)
+                y = (i + 0.5) * cell + rng.uniform(-cell * 0.2, cell * 0.2)
+                boxes.append((x, y, cell * 0.5, cell * 0.7))
+                classes.append(grid[i][j])  # 類別編號即數字
+                confs.append(rng.uniform(0.8, 1.0))
+                if rng.random() < 0.1:
+                    boxes.append((x, y, cell * 0.5, cell * 0.7))
+                    classes.append(grid[i][j] % 9 + 1)
+                    confs.append(rng.uniform(0.1, 0.5))
+    return (np.array(boxes, dtype=np.float32).reshape(-1, 4), np.array(classes, dtype=np.float32),
+            np.array(confs, dtype=np.float32))
+
+
+def bench_grid_mapping(corpus, repeat):
+    """偵測框映射到9x9網格的階段（不需要模型）"""
+    import random
+    from pipeline import map_detections
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(repeat):
+        for _, _, grid in corpus:
+            xywh, cls, conf = synthetic_detections(grid, rng)
+            (mapped, _), elapsed = timed(map_detections, xywh, cls, conf, (BOARD_SIZE, BOARD_SIZE))
+            if mapped != grid:
+                raise RuntimeError("格子映射結果與正確網格不一致")
+            latencies.append(elapsed)
+    return {'grid_mapping': summarize(latencies)}
+
+
+def bench_recognition(images, repeat, backend):
+    """辨識階段：對範例圖片執行YOLO推理，返回(階段統計, 正確率)；模型或ultralytics不存在時返回({}, None)"""
+    from pipeline import SudokuPipeline, default_model_path, to_image_array
+    if not images or not os.path.exists(default_model_path(backend)):
+        return {}, None
+    try:
+        pipeline = SudokuPipeline(backend=backend)
+        pipeline.warm_up()
+    except ImportError:
+        return {}, None
+    arrays = [(to_image_array(path), grid) for path, grid in images]
+    latencies = []
+    correct = 0
+    for _ in range(repeat):
+        for array, grid in arrays:
+            cells, elapsed = timed(pipeline.recognize_cells, array)
+            latencies.append(elapsed)
+            correct += cells is not None and cells[0] == grid
+    return {f"recognize.{backend}": summarize(latencies)}, correct / len(latencies)
+
+
+def bench_fill(corpus, speed):
+    """自動填入階段：以RecordingDriver計算各填入方式的模擬耗時"""
+    stages = {}
+    delay = fill_delay(speed)
+    for mode in FILL_MODES:
+        latencies = []
+        events = 0
+        for _, _, grid in corpus:
+            solution = [row[:] for row in grid]
+            create_solver('dlx').solve(solution)
+            driver = RecordingDriver(pause=delay)
+            fill_solution(driver, grid, solution, lambda i, j: (j * 50 + 25, i * 50 + 25), mode=mode, delay=delay)
+            latencies.append(driver.simulated_time)
+            events += len(driver.events)
+        stages[f"fill.{mode}"] = dict(summarize(latencies), events_per_puzzle=events / len(corpus))
+    return stages
+
+
+def run_benchmark(solver_names=('bitmask', 'dlx'), repeat=3, speed=10.0, backend='pytorch'):
+    """執行所有階段並返回可寫成JSON的結果"""
+    corpus = load_corpus()
+    images = load_images()
+    stages = {}
+    stages.update(bench_solvers(corpus, solver_names, repeat))
+    stages.update(bench_unique_check(corpus, repeat))
+    stages.update(bench_grid_mapping(corpus, repeat))
+    recognition, accuracy = bench_recognition(images, repeat, backend)
+    stages.update(recognition)
+    stages.update(bench_fill(corpus, speed))
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'puzzles': len(corpus),
+            'images': len(images),
+            'repeat': repeat,
+            'fill_speed': speed,
+            'recognition_accuracy': accuracy,
+        },
+        'stages': stages,
+    }
+
+
+def compare(result, baseline, tolerance=0.25):
+    """與基準結果比較各階段p50，返回[(階段, 基準毫秒, 目前毫秒, 比值, 是否退步)]"""
+    rows = []
+    for stage, stats in result['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or not base['p50_ms']:
+            continue
+        ratio = stats['p50_ms'] / base['p50_ms']
+        rows.append((stage, base['p50_ms'], stats['p50_ms'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def print_report(result):
+    """輸出各階段延遲表"""
+    print(f"{'階段':<28}{'次數':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'每秒':>10}")
+    for stage, stats in result['stages'].items():
+        print(f"{stage:<28}{stats['count']:>6}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+              f"{stats['p99_ms']:>10.3f}{stats['per_sec']:>10.1f}")
+    accuracy = result['meta']['recognition_accuracy']
+    if accuracy is None:
+        print("辨識階段已略過（找不到模型或ultralytics）")
+    else:
+        print(f"範例圖片辨識正確率: {accuracy:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解題、辨識與自動填入各階段的效能測試")
+    parser.add_argument('--solvers', nargs='*', default=['bitmask', 'dlx'], choices=list(SOLVERS),
+                        help="測試的解題引擎（backtrack在hardest題目上需要數分鐘）")
+    parser.add_argument('--repeat', type=int, default=3, help="每題重複次數")
+    parser.add_argument('--speed', type=float, default=10.0, help="自動填入速度滑塊值（1~10）")
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, choices=sorted(MODEL_BACKENDS),
+                        help="辨識階段使用的推理後端")
+    parser.add_argument('-o', '--output', help="將結果寫入JSON檔")
+    parser.add_argument('--baseline', help="基準結果JSON檔，輸出各階段p50的變化")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="p50變慢超過此比例視為退步")
+    parser.add_argument('--make-images', action='store_true', help="重新產生範例題目圖片後結束")
+    args = parser.parse_args()
+
+    if args.make_images:
+        print(f"已產生 {make_images(load_corpus())} 張範例圖片")
+        return 0
+
+    result = run_benchmark(args.solvers, args.repeat, args.speed, args.backend)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(result, baseline, args.tolerance)
+        print(f"\n{'階段':<28}{'基準p50':>10}{'目前p50':>10}{'比值':>8}")
+        for stage, base, current, ratio, regressed in rows:
+            print(f"{stage:<28}{base:>10.3f}{current:>10.3f}{ratio:>8.2f}{'  退步' if regressed else ''}")
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import math
+import threading
+from collections import OrderedDict
+
+from pipeline import has_detections, results_to_cells
+
+CELL_THUMBNAIL = 12                        # 每格縮圖邊長（像素）
+
+
+def cell_keys(image_array):
+    """將題目區域平均切成81格，返回每格灰階縮圖量化後的位元組，作為快取鍵"""
+    import numpy as np
+    from PIL import Image
+    size = 9 * CELL_THUMBNAIL
+    thumb = np.asarray(Image.fromarray(image_array).convert('L').resize((size, size), Image.BILINEAR))
+    # 量化為16階，降低截圖雜訊造成的鍵值變動
+    blocks = (thumb >> 4).reshape(9, CELL_THUMBNAIL, 9, CELL_THUMBNAIL).swapaxes(1, 2).reshape(81, -1)
+    return [block.tobytes() for block in blocks]
+
+
+class CellCache:
+    """以格子影像為鍵的辨識快取，重新掃描時只辨識內容改變的格子
+
+    所有格子都命中時完全不執行推理；少數格子改變時只對涵蓋這些格子的最小矩形（向外多取 context 格）
+    執行YOLO；改變的格子超過 full_pass_ratio 時改為完整推理。部分推理的結果為空格或信心度低於
+    min_confidence 時只用於本次畫面、不寫入快取，避免小區域的誤判一直留在快取中。
+    快取可能同時被辨識執行緒與Tk主執行緒（切換後端時清除）存取，以鎖保護。
+    """
+    def __init__(self, max_size=4096, full_pass_ratio=0.5, min_confidence=0.6, context=1):
+        self.max_size = max_size
+        self.full_pass_ratio = full_pass_ratio
+        self.min_confidence = min_confidence
+        self.context = context
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()               # 格子鍵 -> (數字, 信心度)
+        self.hits = 0                              # 命中的格子數
+        self.misses = 0                            # 需要重新辨識的格子數
+        self.skipped = 0                           # 完全不需推理的畫面數
+        self.partial_passes = 0                    # 只辨識部分區域的畫面數
+        self.full_passes = 0                       # 完整推理的畫面數
+
+    def recognize(self, pipeline, image_array):
+        """辨識題目區域，返回(9x9網格, 9x9信心度矩陣)，完整推理沒有偵測到任何數字時返回None"""
+        import numpy as np
+        keys = cell_keys(image_array)
+        values = []
+        with self.lock:
+            for key in keys:
+                value = self.entries.get(key)
+                if value is not None:
+                    self.entries.move_to_end(key)
+                values.append(value)
+            missing = [idx for idx, value in enumerate(values) if value is None]
+            self.hits += 81 - len(missing)
+            self.misses += len(missing)
+
+        if not missing:
+            self.skipped += 1
+        elif len(missing) > 81 * self.full_pass_ratio:
+            results = pipeline.detect(image_array)
+            if not has_detections(results):
+                return None
+            self.full_passes += 1
+            self._fill(keys, values, range(81), *results_to_cells(results))
+        else:
+            # 只辨識涵蓋所有改變格子的最小矩形，向外多取context格作為上下文
+            height, width = image_array.shape[:2]
+            rows = [idx // 9 for idx in missing]
+            cols = [idx % 9 for idx in missing]
+            r0, r1 = max(min(rows) - self.context, 0), min(max(rows) + 1 + self.context, 9)
+            c0, c1 = max(min(cols) - self.context, 0), min(max(cols) + 1 + self.context, 9)
+            y0, y1 = int(r0 * height / 9), math.ceil(r1 * height / 9)
+            x0, x1 = int(c0 * width / 9), math.ceil(c1 * width / 9)
+            crop = np.ascontiguousarray(image_array[y0:y1, x0:x1])
+            self.partial_passes += 1
+            grid, confidence = results_to_cells(pipeline.detect(crop), (height, width), (x0, y0))
+            self._fill(keys, values, missing, grid, confidence, partial=True)
+
+        grid = [[values[i * 9 + j][0] for j in range(9)] for i in range(9)]
+        confidence = [[values[i * 9 + j][1] for j in range(9)] for i in range(9)]
+        return grid, confidence
+
+    def _fill(self, keys, values, indices, grid, confidence, partial=False):
+        """將新辨識的格子寫入結果與快取；部分推理的空格與低信心度結果不寫入快取"""
+        with self.lock:
+            for idx in indices:
+                value = (grid[idx // 9][idx % 9], confidence[idx // 9][idx % 9])
+                values[idx] = value
+                if partial and (value[0] == 0 or value[1] < self.min_confidence):
+                    continue
+                self.entries[keys[idx]] = value
+                self.entries.move_to_end(keys[idx])
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """清除所有快取項目（切換模型時使用）"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """返回快取統計"""
+        with self.lock:
+            size = len(self.entries)
+        total = self.hits + self.misses
+        return {
+            'size': size,
+            'cell_hit_rate': self.hits / total if total else 0.0,
+            'skipped': self.skipped,
+            'partial_passes': self.partial_passes,
+            'full_passes': self.full_passes,
+        }
@@ -0,0 +1,157 @@
+import argparse
+import json
+import os
+
+from screenshot_writer import IMAGE_EXTENSIONS
+#以感知雜湊找出重複或幾乎相同的截圖 分割數據集前去除重複
+
+HASH_SIZE = 16                             # dHash邊長，16x16 = 256位元
+DEFAULT_THRESHOLD = 12                     # 漢明距離不超過此值視為同一群（不同題目通常相差60位元以上）
+INDEX_NAME = 'dedup_index.json'            # 雜湊索引，只重新計算新增或變更的圖片
+
+
+def image_hash(path, hash_size=HASH_SIZE):
+    """計算圖片的差異雜湊（dHash），返回十六進位字串"""
+    import numpy as np
+    from PIL import Image
+    with Image.open(path) as image:
+        gray = np.asarray(image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+    return np.packbits(bits).tobytes().hex()
+
+
+class HashIndex:
+    """保存在磁碟上的雜湊索引：{檔名: {'size', 'mtime_ns', 'hash'}}"""
+    def __init__(self, path, hash_size=HASH_SIZE):
+        self.path = path
+        self.hash_size = hash_size
+        self.entries = {}
+        self.computed = 0                          # 本次重新計算的圖片數
+        self.load()
+
+    def load(self):
+        """從磁碟載入索引，雜湊尺寸不同時捨棄"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print("警告", f"雜湊索引讀取失敗，將重新計算: {str(e)}")
+            return
+        if data.get('hash_size') == self.hash_size:
+            self.entries = data.get('entries', {})
+
+    def save(self):
+        """先寫入暫存檔再取代"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'hash_size': self.hash_size, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def update(self, paths):
+        """計算新增或變更圖片的雜湊並移除已不存在的項目，返回{檔名: (修改時間, 雜湊)}"""
+        result = {}
+        for path in paths:
+            name = os.path.basename(path)
+            stat = os.stat(path)
+            entry = self.entries.get(name)
+            if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                         'hash': image_hash(path, self.hash_size)}
+                self.entries[name] = entry
+                self.computed += 1
+            result[name] = (entry['mtime_ns'], entry['hash'])
+        for name in set(self.entries) - set(result):
+            del self.entries[name]
+        return result
+
+
+def find_clusters(hashes, threshold=DEFAULT_THRESHOLD, chunk=64):
+    """將漢明距離不超過threshold的圖片合併為同一群（遞移），返回群組列表，每群依拍攝先後排序
+
+    hashes 為 {檔名: (修改時間, 十六進位雜湊)}；以NumPy分塊計算兩兩距離。
+    """
+    import numpy as np
+    names = sorted(hashes, key=lambda name: (hashes[name][0], name))
+    if not names:
+        return []
+    bits = np.array([np.frombuffer(bytes.fromhex(hashes[name][1]), dtype=np.uint8) for name in names])
+    popcount = np.array([bin(v).count('1') for v in range(256)], dtype=np.uint16)
+
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for start in range(0, len(names), chunk):
+        block = bits[start:start + chunk]
+        # 只比較排在後面的圖片，避免重複計算
+        distance = popcount[block[:, None, :] ^ bits[None, start:, :]].sum(axis=2)
+        rows, cols = np.nonzero(distance <= threshold)
+        for i, j in zip((rows + start).tolist(), (cols + start).tolist()):
+            if i < j:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+
+    clusters = {}
+    for i, name in enumerate(names):
+        clusters.setdefault(find(i), []).append(name)
+    return list(clusters.values())
+
+
+def select_representatives(clusters, keep=1):
+    """每群保留最早的keep張，返回(保留的{檔名: 群組鍵}, 移除的檔名集合)
+
+    群組鍵為該群最早的檔名，新的截圖加入既有群組時鍵值不變，分割時同一群必定分到同一組。
+    """
+    kept, removed = {}, set()
+    for cluster in clusters:
+        for name in cluster[:keep]:
+            kept[name] = cluster[0]
+        removed.update(cluster[keep:])
+    return kept, removed
+
+
+def dedup_directory(img_dir='img', threshold=DEFAULT_THRESHOLD, keep=1, names=None):
+    """對資料夾中的截圖去除重複，返回(保留的{檔名: 群組鍵}, 移除的檔名集合, 群組列表)
+
+    names 可限定只處理部分檔名（例如已有標註的圖片）。
+    """
+    index = HashIndex(os.path.join(img_dir, INDEX_NAME))
+    if names is None:
+        names = [name for name in os.listdir(img_dir) if name.lower().endswith(IMAGE_EXTENSIONS)]
+    hashes = index.update(os.path.join(img_dir, name) for name in sorted(names))
+    index.save()
+    clusters = find_clusters(hashes, threshold)
+    kept, removed = select_representatives(clusters, keep)
+    print(f"去除重複：{len(hashes)} 張圖片（重新計算 {index.computed} 張）分為 {len(clusters)} 群，"
+          f"保留 {len(kept)} 張，略過 {len(removed)} 張")
+    return kept, removed, clusters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以感知雜湊找出重複或幾乎相同的截圖")
+    parser.add_argument('--img-dir', default='img', help="截圖資料夾")
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f"視為重複的漢明距離上限（共{HASH_SIZE * HASH_SIZE}位元）")
+    parser.add_argument('--keep', type=int, default=1, help="每群保留的圖片數")
+    parser.add_argument('--report', help="將群組結果寫入JSON檔")
+    args = parser.parse_args()
+
+    kept, removed, clusters = dedup_directory(args.img_dir, args.threshold, args.keep)
+    largest = sorted(clusters, key=len, reverse=True)[:5]
+    for cluster in largest:
+        if len(cluster) > 1:
+            print(f"  {cluster[0]}: {len(cluster)} 張")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'clusters': clusters, 'removed': sorted(removed)}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import get_context
+
+from pipeline import MODEL_BACKENDS, default_model_path, map_detections
+from screenshot_writer import IMAGE_EXTENSIONS
+#比較各模型與輸入尺寸的整盤辨識正確率、CPU延遲與記憶體峰值 選出仍能全部讀對的最小最快模型
+
+DEFAULT_IMGSZ = (320, 416, 480, 640)
+COLUMNS = ('model', 'imgsz', 'boards', 'cell_accuracy', 'board_accuracy', 'p50_ms', 'p95_ms',
+           'peak_memory_mb', 'model_size_mb', 'error')
+
+
+def label_path(img_path):
+    """依Ultralytics的規則找出圖片對應的標籤檔：.../images/x.png → .../labels/x.txt，否則為同資料夾的x.txt"""
+    base = os.path.splitext(img_path)[0] + '.txt'
+    parts = base.rsplit(os.sep + 'images' + os.sep, 1)
+    if len(parts) == 2:
+        candidate = os.sep.join((parts[0], 'labels', parts[1]))
+        if os.path.exists(candidate):
+            return candidate
+    return base
+
+
+def label_to_grid(path):
+    """將YOLO格式的標註轉換為9x9正確網格（類別編號即為數字），映射規則與辨識時相同"""
+    import numpy as np
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            values = line.split()
+            if len(values) >= 5:
+                rows.append([float(v) for v in values[:5]])
+    if not rows:
+        return [[0] * 9 for _ in range(9)]
+    boxes = np.array(rows)
+    # 標註座標已歸一化，整個題目區域視為1x1
+    return map_detections(boxes[:, 1:5], boxes[:, 0], np.ones(len(boxes)), (1.0, 1.0))[0]
+
+
+def load_validation_set(source='valid', limit=None):
+    """讀取評估圖片與正確網格，返回[(圖片路徑, 9x9網格)]
+
+    source 為 valid 時使用分割後的驗證集（沒有標註的圖片略過）；benchmark 時使用範例題目圖片。
+    """
+    if source == 'benchmark':
+        from benchmark import load_images
+        samples = load_images()
+    else:
+        from training import dataset_images
+        samples = [(path, label_to_grid(label_path(path))) for path in dataset_images('valid')
+                   if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.exists(label_path(path))]
+    return samples[:limit] if limit else samples
+
+
+def default_models():
+    """sudoku.pt與已匯出的ONNX/OpenVINO模型"""
+    return [path for path in (default_model_path(backend) for backend in MODEL_BACKENDS) if os.path.exists(path)]
+
+
+def model_size_mb(path):
+    """模型檔案（或OpenVINO資料夾）大小"""
+    if os.path.isdir(path):
+        total = sum(os.path.getsize(os.path.join(root, name))
+                    for root, _, names in os.walk(path) for name in names)
+    else:
+        total = os.path.getsize(path)
+    return total / 1024 / 1024
+
+
+def peak_memory_mb():
+    """目前進程的記憶體峰值（RSS），無法取得時返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux以KB為單位，macOS以位元組為單位
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 / 1024  # Windows提供peak_wset
+    except ImportError:
+        return None
+
+
+def evaluate_variant(model_path, imgsz, samples, conf=0.5):
+    """以CPU評估一個模型與輸入尺寸的組合，返回一列結果；無法執行時（例如匯出模型固定尺寸）記錄錯誤"""
+    from benchmark import summarize
+    from pipeline import SudokuPipeline, results_to_cells, to_image_array
+    row = {'model': model_path, 'imgsz': imgsz, 'boards': len(samples)}
+    try:
+        row['model_size_mb'] = model_size_mb(model_path)
+        pipeline = SudokuPipeline(model_path=model_path)
+        arrays = [(to_image_array(path), grid) for path, grid in samples]
+        # 預熱一次，不計入延遲
+        pipeline.model(arrays[0][0], imgsz=imgsz, conf=conf, device='cpu', verbose=False)
+        latencies = []
+        correct_cells = correct_boards = 0
+        for array, expected in arrays:
+            start = time.perf_counter()
+            results = pipeline.model(array, imgsz=imgsz, conf=conf, device='cpu', verbose=False)
+            grid = results_to_cells(results)[0]
+            latencies.append(time.perf_counter() - start)
+            matches = sum(a == b for got, want in zip(grid, expected) for a, b in zip(got, want))
+            correct_cells += matches
+            correct_boards += matches == 81
+    except Exception as e:
+        row['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        return row
+    stats = summarize(latencies)
+    row.update(cell_accuracy=correct_cells / (81 * len(arrays)), board_accuracy=correct_boards / len(arrays),
+               p50_ms=stats['p50_ms'], p95_ms=stats['p95_ms'], peak_memory_mb=peak_memory_mb())
+    return row
+
+
+def _evaluate_task(task):
+    return evaluate_variant(*task)
+
+
+def evaluate_models(model_paths, sizes, samples, conf=0.5, isolate=True):
+    """評估所有模型與輸入尺寸的組合，逐一產生結果
+
+    isolate=True 時每個組合在新的進程中執行，記憶體峰值不受先前載入的模型影響。
+    """
+    tasks = [(path, imgsz, samples, conf) for path in model_paths for imgsz in sizes]
+    if not isolate:
+        yield from map(_evaluate_task, tasks)
+        return
+    with get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+        yield from pool.imap(_evaluate_task, tasks)
+
+
+def best_variant(rows):
+    """所有圖片都完全讀對的組合中，p50延遲最低者（相同時取模型檔案較小者）"""
+    perfect = [row for row in rows if not row.get('error') and row['board_accuracy'] == 1.0]
+    if not perfect:
+        return None
+    return min(perfect, key=lambda row: (row['p50_ms'], row['model_size_mb']))
+
+
+def _format(value, key):
+    if value is None:
+        return ''
+    if key in ('cell_accuracy', 'board_accuracy'):
+        return f"{value:.2%}"
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+def format_markdown(rows):
+    """將結果整理為Markdown表格"""
+    lines = ['| ' + ' | '.join(COLUMNS) + ' |', '|' + '---|' * len(COLUMNS)]
+    for row in rows:
+        lines.append('| ' + ' | '.join(_format(row.get(key), key) for key in COLUMNS) + ' |')
+    return '\n'.join(lines) + '\n'
+
+
+def write_results(rows, path):
+    """依副檔名寫出.md、.csv或.json比較表"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': rows}, f,
+                      ensure_ascii=False, indent=2)
+    elif extension == '.csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows({key: row.get(key, '') for key in COLUMNS} for row in rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(format_markdown(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較各模型與輸入尺寸在驗證集上的整盤辨識正確率、CPU延遲與記憶體峰值")
+    parser.add_argument('--models', nargs='*', default=None,
+                        help="模型路徑（.pt、.onnx或OpenVINO資料夾），預設為sudoku.pt與已匯出的模型")
+    parser.add_argument('--imgsz', nargs='*', type=int, default=list(DEFAULT_IMGSZ), help="測試的輸入尺寸")
+    parser.add_argument('--source', default='valid', choices=['valid', 'benchmark'],
+                        help="valid使用分割後的驗證集與標註，benchmark使用範例題目圖片")
+    parser.add_argument('--limit', type=int, default=None, help="最多使用的圖片數")
+    parser.add_argument('--conf', type=float, default=0.5, help="信心度門檻")
+    parser.add_argument('--no-isolate', action='store_true', help="在同一個進程中評估（記憶體峰值為累計值）")
+    parser.add_argument('-o', '--output', default='model_comparison.md', help="比較表輸出檔（.md、.csv或.json）")
+    args = parser.parse_args()
+
+    samples = load_validation_set(args.source, args.limit)
+    if not samples:
+        print("錯誤", "找不到評估圖片，請先執行 split_dataset.py 或改用 --source benchmark")
+        return 1
+    model_paths = args.models or default_models()
+    for path in [path for path in model_paths if not os.path.exists(path)]:
+        print("警告", f"找不到模型 {path}，略過")
+        model_paths.remove(path)
+    if not model_paths:
+        print("錯誤", "找不到模型，請以 --models 指定")
+        return 1
+    print(f"以 {len(samples)} 張圖片評估 {len(model_paths)} 個模型 × {len(args.imgsz)} 種輸入尺寸")
+
+    rows = []
+    for row in evaluate_models(model_paths, args.imgsz, samples, args.conf, not args.no_isolate):
+        rows.append(row)
+        if row.get('error'):
+            print("警告", f"{row['model']} imgsz={row['imgsz']} 無法執行: {row['error']}")
+        else:
+            print(f"{row['model']} imgsz={row['imgsz']}：格子 {row['cell_accuracy']:.2%}，"
+                  f"整盤 {row['board_accuracy']:.2%}，p50 {row['p50_ms']:.1f} ms")
+
+    print(format_markdown(rows))
+    write_results(rows, args.output)
+    print(f"已寫出比較表 {args.output}")
+    best = best_variant(rows)
+    if best is None:
+        print("提示", "沒有任何組合讀對所有圖片")
+    else:
+        print(f"所有圖片皆讀對且最快：{best['model']} imgsz={best['imgsz']}（p50 {best['p50_ms']:.1f} ms）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import argparse
+import os
+
+from ultralytics import YOLO
+from pipeline import SudokuPipeline, MODEL_BACKENDS, default_model_path
+from screenshot_writer import IMAGE_EXTENSIONS
+#匯出CPU推理用的模型 並檢查各後端辨識結果是否一致
+
+DATASET_DIR = 'datasets'
+
+
+def export_models(weights='sudoku.pt', formats=('onnx',), imgsz=480, int8=False, data='./datasets/data.yaml'):
+    """匯出ONNX/OpenVINO模型，返回{後端名稱: 匯出路徑}"""
+    model = YOLO(weights)
+    outputs = {}
+    if 'onnx' in formats:
+        outputs['onnx'] = model.export(format='onnx', imgsz=imgsz, simplify=True)
+    if 'openvino' in formats:
+        outputs['openvino'] = model.export(format='openvino', imgsz=imgsz)
+    if int8:
+        # INT8量化需要校正資料集
+        outputs['openvino-int8'] = model.export(format='openvino', imgsz=imgsz, int8=True, data=data)
+    return outputs
+
+
+def manifest_split(dataset_dir=DATASET_DIR):
+    """數據集是否以 split_dataset.py --mode manifest 分割（驗證集資料夾沒有圖片、只有valid.txt清單）"""
+    image_dir = os.path.join(dataset_dir, 'valid', 'images')
+    has_images = os.path.isdir(image_dir) and any(name.lower().endswith(IMAGE_EXTENSIONS)
+                                                  for name in os.listdir(image_dir))
+    return not has_images and os.path.exists(os.path.join(dataset_dir, 'valid.txt'))
+
+
+def default_data_yaml(dataset_dir=DATASET_DIR):
+    """INT8校正資料集：manifest模式時使用實際寫出的data_manifest.yaml"""
+    name = 'data_manifest.yaml' if manifest_split(dataset_dir) else 'data.yaml'
+    return os.path.join(dataset_dir, name)
+
+
+def sample_images(check=None, dataset_dir=DATASET_DIR):
+    """列出一致性檢查用的圖片：check為資料夾或圖片清單（.txt），None時使用驗證集（manifest模式時讀取valid.txt）"""
+    if check is None:
+        subpath = 'valid.txt' if manifest_split(dataset_dir) else os.path.join('valid', 'images')
+        check = os.path.join(dataset_dir, subpath)
+    if os.path.isfile(check):
+        base = os.path.dirname(check)
+        with open(check, 'r', encoding='utf-8') as f:
+            return [os.path.normpath(os.path.join(base, line.strip())) for line in f if line.strip()]
+    if not os.path.isdir(check):
+        return []
+    return sorted(os.path.join(check, name) for name in os.listdir(check)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def check_parity(backends, image_paths, reference='pytorch'):
+    """比較各後端在樣本圖片上的辨識網格是否與參考後端完全相同，返回{後端名稱: 不一致的圖片列表}"""
+    pipeline = SudokuPipeline(backend=reference)
+    reference_grids = [pipeline.recognize(path) for path in image_paths]
+    mismatches = {}
+    for backend in backends:
+        if backend == reference:
+            continue
+        pipeline = SudokuPipeline(backend=backend)
+        grids = [pipeline.recognize(path) for path in image_paths]
+        mismatches[backend] = [path for path, grid, expected in zip(image_paths, grids, reference_grids)
+                               if grid != expected]
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="匯出ONNX/OpenVINO模型並檢查辨識結果一致性")
+    parser.add_argument('--weights', default='sudoku.pt', help="PyTorch權重檔")
+    parser.add_argument('--formats', nargs='*', default=['onnx', 'openvino'], choices=['onnx', 'openvino'],
+                        help="匯出格式")
+    parser.add_argument('--int8', action='store_true', help="另外匯出INT8量化的OpenVINO模型")
+    parser.add_argument('--imgsz', type=int, default=480, help="匯出輸入尺寸（與訓練相同）")
+    parser.add_argument('--data', default=None,
+                        help="INT8量化用的校正資料集（預設 datasets/data.yaml，manifest模式時為 data_manifest.yaml）")
+    parser.add_argument('--check', default=None,
+                        help="一致性檢查用的樣本圖片目錄或圖片清單（預設為驗證集，manifest模式時讀取 datasets/valid.txt），"
+                             "設為空字串則略過")
+    parser.add_argument('--samples', type=int, default=50, help="一致性檢查最多使用的圖片數")
+    args = parser.parse_args()
+
+    data = args.data or default_data_yaml()
+    for backend, path in export_models(args.weights, args.formats, args.imgsz, args.int8, data).items():
+        print(f"已匯出 {backend}: {path}")
+
+    if args.check == '':
+        return
+    image_paths = sample_images(args.check)[:args.samples]
+    if not image_paths:
+        print("警告", f"{args.check or '驗證集'} 中沒有樣本圖片，略過一致性檢查")
+        return
+    backends = [b for b in MODEL_BACKENDS if b != 'pytorch' and os.path.exists(default_model_path(b))]
+    for backend, failed in check_parity(backends, image_paths).items():
+        status = "一致" if not failed else f"{len(failed)} 張不一致"
+        print(f"{backend}: {len(image_paths)} 張圖片 {status}")
+        for path in failed:
+            print(f"  {path}")
+
+
+if __name__ == '__main__':
+    main()
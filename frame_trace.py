@@ -0,0 +1,166 @@
+import cProfile
+import io
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import threading
+import time
+from collections import deque
+
+TRACE_PATH = os.path.join('logs', 'trace.jsonl')
+
+
+class FrameTrace:
+    """單次截圖（或匯入圖片）從擷取到填入的各階段耗時"""
+    def __init__(self, source):
+        self.source = source                       # hotkey / watch / file
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+        self.spans = []                            # (階段名稱, 開始毫秒, 耗時毫秒)
+        self.attrs = {}
+
+    def to_dict(self):
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.timestamp)),
+            'source': self.source,
+            'total_ms': round((time.perf_counter() - self.start) * 1000, 3),
+            'spans': [{'name': name, 'start_ms': round(start, 3), 'ms': round(ms, 3)}
+                      for name, start, ms in self.spans],
+            **self.attrs,
+        }
+
+
+class _Span:
+    """記錄一個階段耗時的context manager，沒有進行中的畫面時不做任何事"""
+    def __init__(self, frame, name):
+        self.frame = frame
+        self.name = name
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.frame is not None:
+            end = time.perf_counter()
+            self.frame.spans.append((self.name, (self.begin - self.frame.start) * 1000, (end - self.begin) * 1000))
+        return False
+
+
+class Tracer:
+    """以執行緒為單位追蹤目前處理中的畫面，完成後寫入輪替的JSON Lines記錄並更新統計
+
+    frame() 可以巢狀呼叫，只有最外層會建立與輸出記錄；span() 在沒有進行中的畫面時不做任何事。
+    """
+    def __init__(self, path=TRACE_PATH, max_bytes=1024 * 1024, backups=3, enabled=True, window=100):
+        self.path = path
+        self.max_bytes = max_bytes                 # 單一記錄檔上限，超過即輪替
+        self.backups = backups                     # 保留的舊記錄檔數量
+        self.enabled = enabled                     # 是否寫入記錄檔
+        self.durations = {}                        # 階段名稱 -> 最近window次的耗時（毫秒）
+        self.window = window
+        self.frames = 0
+        self.profile_next = False                  # 下一個畫面以cProfile分析
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        self._logger = None
+
+    def _get_logger(self):
+        """第一次寫入時才建立記錄檔"""
+        if self._logger is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            logger = logging.getLogger(f'sudoku.trace.{id(self)}')
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                                           backupCount=self.backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    @property
+    def current(self):
+        """目前執行緒正在處理的畫面，沒有時為None"""
+        return getattr(self._local, 'frame', None)
+
+    def span(self, name):
+        """記錄一個階段：with tracer.span('solve'): ..."""
+        return _Span(self.current, name)
+
+    def set(self, **attrs):
+        """在目前畫面的記錄中加入額外欄位"""
+        frame = self.current
+        if frame is not None:
+            frame.attrs.update(attrs)
+
+    def frame(self, source):
+        """開始追蹤一個畫面：with tracer.frame('hotkey'): ..."""
+        return _FrameContext(self, source)
+
+    def _begin(self, source):
+        if self.current is not None:
+            return False
+        self._local.frame = FrameTrace(source)
+        profile = None
+        with self.lock:
+            if self.profile_next:
+                self.profile_next = False
+                profile = cProfile.Profile()
+        self._local.profile = profile
+        if profile is not None:
+            profile.enable()
+        return True
+
+    def _end(self):
+        frame, profile = self._local.frame, self._local.profile
+        self._local.frame = self._local.profile = None
+        if profile is not None:
+            profile.disable()
+            frame.attrs['profile'] = self.dump_profile(profile)
+        record = frame.to_dict()
+        with self.lock:
+            self.frames += 1
+            for name, _, ms in frame.spans + [('total', 0.0, record['total_ms'])]:
+                self.durations.setdefault(name, deque(maxlen=self.window)).append(ms)
+        if self.enabled:
+            try:
+                self._get_logger().info(json.dumps(record, ensure_ascii=False))
+            except Exception as e:
+                print("錯誤", f"效能記錄寫入失敗: {str(e)}")
+
+    def dump_profile(self, profile):
+        """保存cProfile結果（與記錄檔同一資料夾）並輸出累計耗時最高的函數，返回保存路徑"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+        profile.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats('cumulative').print_stats(20)
+        print(out.getvalue())
+        print("完成", f"cProfile結果已保存至 {path}")
+        return path
+
+    def summary(self):
+        """返回各階段最近耗時的{階段: (次數, p50毫秒, p95毫秒)}"""
+        with self.lock:
+            snapshot = {name: sorted(values) for name, values in self.durations.items()}
+        return {name: (len(values), values[len(values) // 2], values[min(int(len(values) * 0.95), len(values) - 1)])
+                for name, values in snapshot.items() if values}
+
+
+class _FrameContext:
+    def __init__(self, tracer, source):
+        self.tracer = tracer
+        self.source = source
+
+    def __enter__(self):
+        self.owner = self.tracer._begin(self.source)
+        return self.tracer.current
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.owner:
+            self.tracer._end()
+        return False
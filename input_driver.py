@@ -0,0 +1,102 @@
+import time
+
+
+class InputDriver:
+    """自動填入使用的滑鼠鍵盤介面（pyautogui相容的方法名稱）
+
+    pause 為每次呼叫後的等待秒數，對應 pyautogui.PAUSE。
+    """
+    def set_pause(self, pause):
+        raise NotImplementedError
+
+    def moveTo(self, x, y):
+        raise NotImplementedError
+
+    def click(self, x=None, y=None):
+        raise NotImplementedError
+
+    def write(self, text, interval=0.0):
+        raise NotImplementedError
+
+    def press(self, keys, interval=0.0):
+        raise NotImplementedError
+
+
+class PyAutoGUIDriver(InputDriver):
+    """實際操作滑鼠鍵盤的驅動，首次使用時才匯入pyautogui（無顯示環境無法匯入）"""
+    def __init__(self):
+        self._gui = None
+
+    @property
+    def gui(self):
+        if self._gui is None:
+            import pyautogui
+            self._gui = pyautogui
+        return self._gui
+
+    def set_pause(self, pause):
+        self.gui.PAUSE = pause
+
+    def moveTo(self, x, y):
+        self.gui.moveTo(x, y)
+
+    def click(self, x=None, y=None):
+        self.gui.click(x, y)
+
+    def write(self, text, interval=0.0):
+        self.gui.write(text, interval=interval)
+
+    def press(self, keys, interval=0.0):
+        self.gui.press(keys, interval=interval)
+
+
+class RecordingDriver(InputDriver):
+    """不操作螢幕，只記錄每個事件與時間戳的驅動，用於無顯示環境的填入效能測試
+
+    依pyautogui的等待規則累計模擬耗時：每次呼叫等待一次pause，write/press每個按鍵另等待interval。
+    sleep=True 時實際等待，wall time與真實填入相同。
+    """
+    def __init__(self, pause=0.0, sleep=False):
+        self.pause = pause
+        self.sleep = sleep
+        self.events = []                           # (時間戳, 事件名稱, 參數)
+        self.simulated_time = 0.0                  # 依等待規則累計的耗時（秒）
+        self.start = time.perf_counter()
+
+    def reset(self):
+        """清除記錄"""
+        self.events = []
+        self.simulated_time = 0.0
+        self.start = time.perf_counter()
+
+    def _record(self, name, args, wait):
+        self.events.append((time.perf_counter() - self.start, name, args))
+        wait += self.pause
+        self.simulated_time += wait
+        if self.sleep and wait > 0:
+            time.sleep(wait)
+
+    def set_pause(self, pause):
+        self.pause = pause
+
+    def moveTo(self, x, y):
+        self._record('moveTo', (x, y), 0.0)
+
+    def click(self, x=None, y=None):
+        self._record('click', (x, y), 0.0)
+
+    def write(self, text, interval=0.0):
+        self._record('write', (text,), interval * len(text))
+
+    def press(self, keys, interval=0.0):
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        self._record('press', (keys,), interval * len(keys))
+
+    def counts(self):
+        """返回{事件名稱: 次數}，另以'keys'統計送出的按鍵總數"""
+        counts = {}
+        for _, name, args in self.events:
+            counts[name] = counts.get(name, 0) + 1
+            if name in ('write', 'press'):
+                counts['keys'] = counts.get('keys', 0) + len(args[0])
+        return counts
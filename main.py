@@ -1,110 +1,57 @@
+import time
+_start_time = time.perf_counter()  # 啟動時間測量起點（在其他匯入之前）
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import ImageGrab, Image
-import keyboard
 import os
+import sys
 import json
-from ultralytics import YOLO
-import numpy as np
-import pyautogui
-import random
-import string
-
-class SudokuSolver:
-    """數獨解題器類別，使用優化的約束傳播和啟發式算法"""
-    def __init__(self):
-        self.rows = [set() for _ in range(9)]      # 跟踪每行已使用的數字
-        self.cols = [set() for _ in range(9)]      # 跟踪每列已使用的數字
-        self.boxes = [set() for _ in range(9)]     # 跟踪每個3x3方格已使用的數字
-        self.empty_cells = []                      # 儲存所有空格子的位置
-
-    def initialize_constraints(self, grid):
-        """初始化約束條件和空格子列表"""
-        for i in range(9):
-            for j in range(9):
-                if grid[i][j] != 0:
-                    num = grid[i][j]
-                    self.rows[i].add(num)
-                    self.cols[j].add(num)
-                    self.boxes[(i // 3) * 3 + j // 3].add(num)
-                else:
-                    self.empty_cells.append((i, j))
-        
-        # 按照可能的候選數字數量排序空格子（啟發式）
-        self.empty_cells.sort(key=lambda pos: self._count_candidates(grid, pos))
-
-    def _count_candidates(self, grid, pos):
-        """計算一個空格子可能的候選數字數量"""
-        i, j = pos
-        box_idx = (i // 3) * 3 + j // 3
-        used = self.rows[i] | self.cols[j] | self.boxes[box_idx]
-        return sum(1 for num in range(1, 10) if num not in used)
-
-    def is_valid(self, num, pos):
-        """檢查在指定位置放置數字是否有效"""
-        i, j = pos
-        box_idx = (i // 3) * 3 + j // 3
-        return (num not in self.rows[i] and
-                num not in self.cols[j] and
-                num not in self.boxes[box_idx])
-
-    def solve(self, grid):
-        """解決數獨"""
-        self.initialize_constraints(grid)
-        return self._backtrack(grid, 0)
-
-    def _backtrack(self, grid, idx):
-        """回溯算法"""
-        if idx >= len(self.empty_cells):
-            return True
-        
-        i, j = self.empty_cells[idx]
-        box_idx = (i // 3) * 3 + j // 3
-        
-        # 使用約束條件快速找出候選數字
-        candidates = [num for num in range(1, 10) if self.is_valid(num, (i, j))]
-        
-        for num in candidates:
-            # 放置數字並更新約束
-            grid[i][j] = num
-            self.rows[i].add(num)
-            self.cols[j].add(num)
-            self.boxes[box_idx].add(num)
-            
-            # 繼續解下一個空格子
-            if self._backtrack(grid, idx + 1):
-                return True
-            
-            # 回溯
-            grid[i][j] = 0
-            self.rows[i].remove(num)
-            self.cols[j].remove(num)
-            self.boxes[box_idx].remove(num)
-        
-        return False
+import threading
+# keyboard、numpy、PIL、ultralytics等較重的模組在第一次使用時才匯入
+from solver import SOLVERS, DEFAULT_SOLVER, BUDGET_EXCEEDED
+from solution_cache import SolutionCache
+from pipeline import SudokuPipeline, MODEL_BACKENDS, DEFAULT_BACKEND, to_image_array
+from screenshot_writer import ScreenshotWriter, SAVE_FORMATS
+from pipeline_executor import PipelineExecutor
+from watch_mode import BoardWatcher, grab_region
+from cell_cache import CellCache
+from auto_fill import FILL_MODES, DEFAULT_FILL_MODE, fill_delay, fill_solution
+from input_driver import PyAutoGUIDriver
+from frame_trace import Tracer
 
 window_width = 330  # 縮小預設視窗寬度
 window_height = 150  # 縮小預設視窗高度
 
+APP_TITLE = "sudoku解題器"
+
 class ScreenshotApp:
-    def __init__(self):
+    def __init__(self, measure_startup=False):
+        self.measure_startup = measure_startup      # 啟動時間測量模式：模型就緒後輸出耗時並結束
+        self.startup_times = {}
         self.root = tk.Tk()
-        self.root.title("sudoku解題器")
+        self.root.title(f"{APP_TITLE}（模型載入中…）")
         self.root.attributes("-topmost", True)
         self.root.resizable(False, False)
         
+        # 解答快取（以題目標準型為鍵，關閉程式時保存）
+        self.solution_cache = SolutionCache(max_size=1024, path='solution_cache.json')
+
+        # 截圖→辨識→解題在背景執行緒執行，同時只處理一個畫面
+        self.executor = PipelineExecutor()
+        self.input_driver = PyAutoGUIDriver()
+
+        # 各階段耗時追蹤（logs/trace.jsonl，超過1MB輪替）
+        self.tracer = Tracer()
+
+        # 背景截圖保存（可在設定中停用或改變格式）
+        self.screenshot_writer = ScreenshotWriter()
+
         # 添加速度調整滑塊的變數
         self.speed_scale_var = tk.DoubleVar(value=10.0)  # 預設值為10
         
-        # 載入YOLO模型
-        try:
-            model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sudoku.pt')
-            if not os.path.exists(model_path):
-                model_path = 'sudoku.pt'  # 回退到當前目錄
-            self.model = YOLO(model_path)
-        except Exception as e:
-            print("錯誤", f"模型載入失敗: {str(e)}")
-            raise e
+        # YOLO模型在視窗顯示後於背景執行緒載入（見start_model_loading）
+        # 解題時間上限避免辨識錯誤的題目長時間搜尋（設定檔 solver_max_time / solver_max_nodes）
+        self.pipeline = SudokuPipeline(cache=self.solution_cache, cell_cache=CellCache(), max_time=2.0)
+        self.model_ready = False
         
         # 主視窗大小和位置
         screen_width = self.root.winfo_screenwidth()
@@ -163,6 +110,57 @@ class ScreenshotApp:
                                            command=self.toggle_result_display)
         self.show_result_cb.grid(row=2, column=0, columnspan=3, sticky=tk.W)
 
+        self.save_screenshot_var = tk.BooleanVar(value=True)  # 預設保存截圖
+        self.save_screenshot_cb = ttk.Checkbutton(self.advanced_frame, text="保存截圖至img資料夾",
+                                                  variable=self.save_screenshot_var,
+                                                  command=self.toggle_save_screenshot)
+        self.save_screenshot_cb.grid(row=5, column=0, columnspan=3, sticky=tk.W, pady=5)
+
+        # 監看模式：定時比較題目區域畫面，改變時才執行辨識
+        self.watch_var = tk.BooleanVar(value=False)
+        self.watcher = BoardWatcher(lambda: self.run_in_ui(self.get_screenshot_area),
+                                    lambda image: self.executor.submit(self.process_capture, image),
+                                    is_busy=self.executor.is_busy)
+        self.watch_cb = ttk.Checkbutton(self.advanced_frame, text="監看模式（自動辨識新題目）",
+                                        variable=self.watch_var,
+                                        command=self.toggle_watch_mode)
+        self.watch_cb.grid(row=6, column=0, columnspan=3, sticky=tk.W)
+
+        # 解題引擎選擇
+        self.solver_var = tk.StringVar(value=DEFAULT_SOLVER)
+        ttk.Label(self.advanced_frame, text="解題引擎:").grid(row=3, column=0, sticky=tk.W)
+        solver_combo = ttk.Combobox(self.advanced_frame, textvariable=self.solver_var,
+                                    values=list(SOLVERS), width=10, state="readonly")
+        solver_combo.grid(row=3, column=1, sticky=tk.W, padx=5, pady=5)
+        solver_combo.bind("<<ComboboxSelected>>", lambda event: self.save_settings())
+
+        # 推理後端選擇（ONNX/OpenVINO模型需先以export_model.py匯出）
+        self.backend_var = tk.StringVar(value=DEFAULT_BACKEND)
+        ttk.Label(self.advanced_frame, text="推理後端:").grid(row=4, column=0, sticky=tk.W)
+        backend_combo = ttk.Combobox(self.advanced_frame, textvariable=self.backend_var,
+                                     values=list(MODEL_BACKENDS), width=12, state="readonly")
+        backend_combo.grid(row=4, column=1, sticky=tk.W, padx=5, pady=5)
+        backend_combo.bind("<<ComboboxSelected>>", lambda event: self.change_backend())
+
+        # 自動填入方式（mouse為原本逐格移動點擊的方式，遊戲不支援方向鍵時使用）
+        self.fill_mode_var = tk.StringVar(value=DEFAULT_FILL_MODE)
+        ttk.Label(self.advanced_frame, text="填入方式:").grid(row=7, column=0, sticky=tk.W)
+        fill_mode_combo = ttk.Combobox(self.advanced_frame, textvariable=self.fill_mode_var,
+                                       values=list(FILL_MODES), width=10, state="readonly")
+        fill_mode_combo.grid(row=7, column=1, sticky=tk.W, padx=5, pady=5)
+        fill_mode_combo.bind("<<ComboboxSelected>>", lambda event: self.save_settings())
+
+        # 效能統計面板與單次cProfile分析
+        self.stats_panel_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.advanced_frame, text="顯示效能統計",
+                        variable=self.stats_panel_var,
+                        command=self.toggle_stats_panel).grid(row=8, column=0, sticky=tk.W, pady=5)
+        ttk.Button(self.advanced_frame, text="分析下一次截圖",
+                   command=self.profile_next_frame).grid(row=8, column=1, sticky=tk.W, padx=5)
+        self.stats_label = ttk.Label(self.advanced_frame, text="", font=("Courier", 9), justify=tk.LEFT)
+        self.stats_label.grid(row=9, column=0, columnspan=3, sticky=tk.W)
+        self.stats_label.grid_remove()
+
         # 添加結果顯示區域
         self.result_frame = ttk.LabelFrame(self.main_frame, text="解題結果", padding="5")
         self.result_frame.grid(row=6, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
@@ -281,6 +279,55 @@ class ScreenshotApp:
         # 載入設定
         self.load_settings()
 
+        # 視窗顯示後才開始載入模型
+        self.root.after(0, self.record_startup, 'window')
+        self.start_model_loading()
+
+    def start_model_loading(self):
+        """在背景執行緒載入模型並執行一次預熱推理，完成後更新視窗標題"""
+        self.model_ready = False
+        self.root.title(f"{APP_TITLE}（模型載入中…）")
+        threading.Thread(target=self._load_model, args=(self.pipeline.backend,), name='model-loader',
+                         daemon=True).start()
+
+    def _load_model(self, backend):
+        """背景執行緒：載入並預熱模型，失敗時退回PyTorch後端"""
+        try:
+            self.pipeline.warm_up()
+        except Exception as e:
+            print("錯誤", f"{backend} 模型載入失敗: {str(e)}")
+            self.root.after(0, self.on_model_failed, backend)
+            return
+        self.root.after(0, self.on_model_ready, backend)
+
+    def on_model_failed(self, backend):
+        """模型載入失敗（於Tk主執行緒執行），非PyTorch後端退回PyTorch"""
+        if backend != self.pipeline.backend:
+            return  # 載入期間已切換為其他後端
+        if backend != DEFAULT_BACKEND:
+            self.fallback_backend()
+        else:
+            self.root.title(f"{APP_TITLE}（模型載入失敗）")
+
+    def on_model_ready(self, backend):
+        """模型就緒（於Tk主執行緒執行）"""
+        if backend != self.pipeline.backend:
+            return  # 載入期間已切換為其他後端
+        self.model_ready = True
+        self.root.title(APP_TITLE)
+        self.record_startup('model')
+
+    def record_startup(self, stage):
+        """記錄啟動各階段距程式開始的時間，測量模式下模型就緒後輸出並結束"""
+        if stage in self.startup_times:
+            return
+        self.startup_times[stage] = time.perf_counter() - _start_time
+        if not self.measure_startup:
+            return
+        print(f"啟動時間 {stage}: {self.startup_times[stage]:.3f} 秒")
+        if stage == 'model':
+            self.root.destroy()
+
     def update_speed_label(self, value):
         """更新速度顯示標籤"""
         self.speed_label.config(text=str(int(float(value))))
@@ -396,8 +443,9 @@ class ScreenshotApp:
         if self.hotkey_active:
             # 註冊熱鍵
             try:
+                import keyboard
                 hotkey = self.get_hotkey_string()
-                keyboard.add_hotkey(hotkey, self.take_screenshot)
+                keyboard.add_hotkey(hotkey, self.request_screenshot)
                 self.toggle_hotkey_button.configure(text="關閉熱鍵")
                 self.save_settings()
             except Exception as e:
@@ -405,6 +453,7 @@ class ScreenshotApp:
                 self.hotkey_active = False
         else:
             # 取消熱鍵
+            import keyboard
             keyboard.unhook_all()
             self.toggle_hotkey_button.configure(text="啟動熱鍵")
             
@@ -423,6 +472,10 @@ class ScreenshotApp:
             self.root.geometry(f"{window_width}x{window_height}")
         self.root.update()
 
+    def toggle_save_screenshot(self):
+        """切換是否保存截圖"""
+        self.screenshot_writer.enabled = self.save_screenshot_var.get()
+
     def toggle_auto_fill(self):
         """處理自動填入選項的切換"""
         if self.auto_fill_var.get():
@@ -458,7 +511,21 @@ class ScreenshotApp:
             'advanced': {
                 'speed_scale': self.speed_scale_var.get(),
                 'auto_fill': self.auto_fill_var.get(),
-                'show_result': self.show_result_var.get()
+                'show_result': self.show_result_var.get(),
+                'solver': self.solver_var.get(),
+                'fill_mode': self.fill_mode_var.get(),
+                'stats_panel': self.stats_panel_var.get(),
+                'trace_log': self.tracer.enabled,
+                'backend': self.backend_var.get(),
+                'save_screenshot': self.save_screenshot_var.get(),
+                'screenshot_format': self.screenshot_writer.fmt,
+                'screenshot_compress_level': self.screenshot_writer.compress_level,
+                'screenshot_quality': self.screenshot_writer.quality,
+                'watch_mode': self.watch_var.get(),
+                'watch_interval': self.watcher.interval,
+                'cell_cache': self.pipeline.cell_cache is not None,
+                'solver_max_time': self.pipeline.max_time,
+                'solver_max_nodes': self.pipeline.max_nodes
             }
         }
         try:
@@ -502,11 +569,45 @@ class ScreenshotApp:
                         self.auto_fill_var.set(settings['advanced']['auto_fill'])
                     if 'show_result' in settings['advanced']:
                         self.show_result_var.set(settings['advanced']['show_result'])
+                    if settings['advanced'].get('solver') in SOLVERS:
+                        self.solver_var.set(settings['advanced']['solver'])
+                    self.tracer.enabled = settings['advanced'].get('trace_log', True)
+                    if settings['advanced'].get('stats_panel', False):
+                        self.stats_panel_var.set(True)
+                        self.layout_stats_panel()
+                    if settings['advanced'].get('fill_mode') in FILL_MODES:
+                        self.fill_mode_var.set(settings['advanced']['fill_mode'])
+                    if 'save_screenshot' in settings['advanced']:
+                        self.save_screenshot_var.set(settings['advanced']['save_screenshot'])
+                        self.toggle_save_screenshot()
+                    if settings['advanced'].get('screenshot_format') in SAVE_FORMATS:
+                        self.screenshot_writer.fmt = settings['advanced']['screenshot_format']
+                    if 'screenshot_compress_level' in settings['advanced']:
+                        level = int(settings['advanced']['screenshot_compress_level'])
+                        self.screenshot_writer.compress_level = min(max(level, 0), 9)
+                    if 'screenshot_quality' in settings['advanced']:
+                        quality = int(settings['advanced']['screenshot_quality'])
+                        self.screenshot_writer.quality = min(max(quality, 1), 100)
+                    self.pipeline.max_time = settings['advanced'].get('solver_max_time', self.pipeline.max_time)
+                    self.pipeline.max_nodes = settings['advanced'].get('solver_max_nodes', self.pipeline.max_nodes)
+                    if not settings['advanced'].get('cell_cache', True):
+                        self.pipeline.cell_cache = None
+                    if 'watch_interval' in settings['advanced']:
+                        self.watcher.interval = float(settings['advanced']['watch_interval'])
+                    if settings['advanced'].get('watch_mode', False):
+                        self.watch_var.set(True)
+                        self.watcher.start()
+                    backend = settings['advanced'].get('backend', DEFAULT_BACKEND)
+                    if backend in MODEL_BACKENDS:
+                        # 模型由__init__在載入設定後統一於背景載入
+                        self.backend_var.set(backend)
+                        self.pipeline.set_backend(backend)
                     # 初始化自動填入和顯示解題結果的狀態
                     self.toggle_auto_fill()
                 
                 # 自動啟動熱鍵
-                self.root.after(1000, self.toggle_hotkey)  # 延遲1秒後啟動熱鍵
+                if not self.measure_startup:
+                    self.root.after(1000, self.toggle_hotkey)  # 延遲1秒後啟動熱鍵
                 
         except Exception as e:
             print(f"載入設定失敗: {e}")
@@ -534,7 +635,8 @@ class ScreenshotApp:
         self.canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
         
         # 綁定Esc鍵取消選擇
-        keyboard.add_hotkey('esc', self.cancel_selection)
+        import keyboard
+        keyboard.add_hotkey('esc', lambda: self.root.after(0, self.cancel_selection))
         
         # 顯示提示文字
         self.show_help_text()
@@ -586,63 +688,136 @@ class ScreenshotApp:
         self.selection_window.destroy()
         self.root.deiconify()  # 恢復主視窗
 
-    def solve_sudoku(self, grid):
-        """使用優化的約束傳播和啟發式算法解決數獨"""
-        solver = SudokuSolver()
-        return solver.solve(grid)
+    def change_backend(self):
+        """切換推理後端並在背景重新載入模型，失敗時退回PyTorch"""
+        self.pipeline.set_backend(self.backend_var.get())
+        self.start_model_loading()
+        self.save_settings()
+
+    def fallback_backend(self):
+        """模型載入失敗時改用PyTorch後端（於Tk主執行緒執行）"""
+        self.backend_var.set(DEFAULT_BACKEND)
+        self.change_backend()
 
-    def random_string(length):
-        """生成指定長度的隨機字串"""
-        letters = string.ascii_letters + string.digits
-        return ''.join(random.choice(letters) for _ in range(length))
+    def run_in_ui(self, func, *args):
+        """在Tk主執行緒執行func並等待結果，供背景執行緒存取介面使用"""
+        if threading.current_thread() is threading.main_thread():
+            return func(*args)
+        done = threading.Event()
+        outcome = {}
+
+        def call():
+            try:
+                outcome['result'] = func(*args)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+        self.root.after(0, call)
+        done.wait()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+    def request_screenshot(self):
+        """熱鍵回呼：交給背景執行器處理，忙碌中的重複按鍵會合併為一次"""
+        self.executor.submit(self.take_screenshot)
+
+    def hide_for_capture(self):
+        """隱藏主視窗並返回截圖區域（於Tk主執行緒執行）"""
+        self.root.withdraw()
+        self.root.update()
+        return self.get_screenshot_area()
 
     def take_screenshot(self):
+        """截圖並辨識解題（於背景執行緒執行）"""
+        with self.tracer.frame('hotkey'):
+            try:
+                # 暫時隱藏主視窗並獲取截圖區域
+                with self.tracer.span('hide'):
+                    x1, y1, x2, y2 = self.run_in_ui(self.hide_for_capture)
+
+                # 獲取螢幕截圖
+                with self.tracer.span('grab'):
+                    screenshot = grab_region((x1, y1, x2, y2))
+
+                self.process_capture(screenshot)
+
+            except Exception as e:
+                print("錯誤", f"截圖失敗: {str(e)}")
+            finally:
+                self.run_in_ui(self.root.deiconify)  # 恢復主視窗顯示
+
+
+    def process_capture(self, screenshot, source='watch'):
+        """保存並辨識一張截圖後解題（於背景執行緒執行）"""
+        with self.tracer.frame(source):
+            self._process_capture(screenshot)
+
+    def _process_capture(self, screenshot):
+        # 交給背景執行緒保存截圖，不等待磁碟寫入
+        with self.tracer.span('save_submit'):
+            filename = self.screenshot_writer.submit(screenshot)
+
+        if not self.model_ready:
+            print("提示", "模型仍在載入中，辨識將在載入完成後進行")
+        # 將PIL Image轉換為numpy array以供YOLO使用
+        with self.tracer.span('to_array'):
+            img_array = to_image_array(screenshot)
+        # 進行數字識別
         try:
-            # 暫時隱藏主視窗
-            self.root.withdraw()
-            self.root.update()
-            
-            # 獲取截圖區域
-            x1, y1, x2, y2 = self.get_screenshot_area()
-            
-            # 獲取螢幕截圖
-            screenshot = ImageGrab.grab(bbox=(x1, y1, x2, y2))
-            
-            # 確保資料夾存在
-            if not os.path.exists('img'):
-                os.makedirs('img')
-
-            # 保存截圖
-            i = 1
-            while True:
-                #檔名前綴為隨機6個字的英文字母和數字，後面為序號001~999.png
-                filename = os.path.join('img', f"{ScreenshotApp.random_string(6)}_{i:03d}.png")
-                if not os.path.exists(filename):
-                    screenshot.save(filename)
-                    # 將PIL Image轉換為numpy array以供YOLO使用
-                    img_array = np.array(screenshot)
-                    # 進行數字識別
-                    try:
-                        results = self.model(img_array)
-                        if not results:
-                            print("警告", "未能識別到任何數字，請確保截圖區域包含完整的數獨題目。")
-                            return
-                        # 顯示識別結果並直接解題
-                        self.show_result(results, filename)
-                    except Exception as e:
-                        print("錯誤", f"數字識別失敗: {str(e)}")
-                    break
-                i += 1
-                
+            with self.tracer.span('recognize'):
+                cells = self.pipeline.recognize_cells(img_array)
+            self.tracer.set(backend=self.pipeline.backend, screenshot=filename)
+            if cells is None:
+                print("警告", "未能識別到任何數字，請確保截圖區域包含完整的數獨題目。")
+                return
+            # 顯示識別結果並直接解題
+            self.show_result(cells[0], filename, cells[1])
         except Exception as e:
-            print("錯誤", f"截圖失敗: {str(e)}")
-        finally:
-            self.root.deiconify()  # 恢復主視窗顯示
+            print("錯誤", f"數字識別失敗: {str(e)}")
+
+    def toggle_stats_panel(self):
+        """顯示或隱藏效能統計面板"""
+        self.layout_stats_panel()
+        self.save_settings()
+
+    def layout_stats_panel(self):
+        """依設定顯示或隱藏統計面板並重新計算視窗大小"""
+        if self.stats_panel_var.get():
+            self.stats_label.grid()
+            self.update_stats_panel()
+        else:
+            self.stats_label.grid_remove()
+        self.toggle_result_display()
 
+    def update_stats_panel(self):
+        """每秒更新各階段最近耗時的p50/p95（於Tk主執行緒執行）"""
+        if not self.stats_panel_var.get():
+            return
+        summary = self.tracer.summary()
+        lines = [f"{'階段':<12}{'p50':>8}{'p95':>8}"]
+        lines += [f"{name:<12}{p50:>7.0f}ms{p95:>6.0f}ms" for name, (_, p50, p95) in summary.items()]
+        self.stats_label.configure(text="\n".join(lines) if summary else "尚無記錄")
+        self.root.after(1000, self.update_stats_panel)
 
-    def calculate_cell_center(self, i, j):
+    def profile_next_frame(self):
+        """下一次截圖以cProfile分析，結果保存至logs資料夾"""
+        self.tracer.profile_next = True
+        print("提示", "下一次截圖將以cProfile分析")
+
+    def toggle_watch_mode(self):
+        """開啟或關閉監看模式：題目區域出現新題目時自動辨識"""
+        if self.watch_var.get():
+            self.watcher.start()
+        else:
+            self.watcher.stop()
+        self.save_settings()
+
+    def calculate_cell_center(self, i, j, area=None):
         """計算指定格子的中心點座標"""
-        x1, y1, x2, y2 = self.get_screenshot_area()
+        x1, y1, x2, y2 = area or self.get_screenshot_area()
         cell_width = (x2 - x1) / 9
         cell_height = (y2 - y1) / 9
         
@@ -652,123 +827,131 @@ class ScreenshotApp:
         return int(center_x), int(center_y)
 
     def auto_fill_solution(self, initial_grid, solution_grid):
-        """自動填入數獨解答"""
+        """自動填入數獨解答（介面操作交回Tk主執行緒）"""
         # 暫時隱藏結果視窗
-        self.root.iconify()
+        self.run_in_ui(self.root.iconify)
+        area = self.run_in_ui(self.get_screenshot_area)
+        mode = self.run_in_ui(self.fill_mode_var.get)
         
-        # 設置pyautogui的安全設定
-        #pyautogui.FAILSAFE = True
-        current_value = self.speed_scale_var.get()  # 獲取當前滑塊值（1-10）
-        # 設置延遲時間 範圍0.0005 ~ 0.3秒
-        pyautogui.PAUSE = 0.3* (0.001/0.3) ** ( (current_value -1) / 9)
+        current_value = self.run_in_ui(self.speed_scale_var.get)  # 獲取當前滑塊值（1-10）
+        # 設置延遲時間 範圍0.001 ~ 0.3秒
+        delay = fill_delay(current_value)
+        self.input_driver.set_pause(delay)
         
         try:
-            # 依序填入每個需要填寫的格子
-            for i in range(9):
-                for j in range(9):
-                    # 只填入非原始數字的位置
-                    if initial_grid[i][j] == 0:
-                        # 計算該格子的中心點座標
-                        x, y = self.calculate_cell_center(i, j)
-                        
-                        # 移動滑鼠到格子中心並點擊
-                        pyautogui.moveTo(x, y+2)
-                        pyautogui.click()
-                        
-                        # 輸入數字
-                        pyautogui.write(str(solution_grid[i][j]))
-            
-            print("完成", "答案已自動填入完成！")
+            # 只填入非原始數字的位置
+            with self.tracer.span('fill'):
+                elapsed = fill_solution(self.input_driver, initial_grid, solution_grid,
+                                        lambda i, j: self.calculate_cell_center(i, j, area),
+                                        mode=mode, delay=delay)
+            self.tracer.set(fill_mode=mode, fill_cells=sum(row.count(0) for row in initial_grid))
+            print("完成", f"答案已自動填入完成！（{mode}，耗時 {elapsed:.2f} 秒）")
         except Exception as e:
             print("錯誤", f"自動填入過程發生錯誤: {str(e)}")
         finally:
-            self.root.deiconify()
-
-    def show_result(self, results, image_path):
-        """處理識別結果並根據設置決定操作模式"""
-        # 創建9x9的網格來儲存數字
-        sudoku_grid = [[0 for _ in range(9)] for _ in range(9)]
-        
-        # 從YOLO結果中獲取數字和位置
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                # 獲取預測的類別（數字）和位置
-                cls = int(box.cls[0])
-                x, y = box.xywh[0][:2]  # 獲取中心點坐標
-                
-                # 計算在9x9網格中的位置
-                grid_x = int(x * 9 / r.orig_shape[1])
-                grid_y = int(y * 9 / r.orig_shape[0])
-                
-                if 0 <= grid_x < 9 and 0 <= grid_y < 9:
-                    sudoku_grid[grid_y][grid_x] = cls
-        
-        # 保存初始網格狀態並創建求解用的網格
-        solution_grid = [row[:] for row in sudoku_grid]
-        
-        # 嘗試解決數獨
-        if self.solve_sudoku(solution_grid):
-            if self.auto_fill_var.get():
+            self.run_in_ui(self.root.deiconify)
+
+    def show_result(self, sudoku_grid, image_path, confidence=None):
+        """處理識別出的題目網格並根據設置決定操作模式"""
+        # 唯一解檢查、解答快取與求解皆由SudokuPipeline處理，這裡只將狀態轉為介面訊息
+        self.pipeline.solver_name = self.run_in_ui(self.solver_var.get)
+        with self.tracer.span('solve'):
+            result = self.pipeline.check_and_solve(sudoku_grid)
+        stats = result['stats']
+        self.tracer.set(solver=self.pipeline.solver_name, search=stats)
+
+        if result['status'] == 'multiple':
+            # 多組解代表辨識結果可能有誤，不進行填入
+            print("警告", "辨識結果有多組解，可能有數字辨識錯誤，已取消自動填入。")
+            if confidence:
+                # 列出信心度最低的已辨識格子，方便檢查
+                filled = [(confidence[i][j], i, j) for i in range(9) for j in range(9) if sudoku_grid[i][j]]
+                suspects = ", ".join(f"({i + 1},{j + 1})={sudoku_grid[i][j]} {conf:.2f}"
+                                     for conf, i, j in sorted(filled)[:3])
+                print("警告", f"信心度最低的格子: {suspects}")
+        elif result['status'] == BUDGET_EXCEEDED:
+            if stats['phase'] == 'search':
+                print("警告", f"解題超過搜尋預算（{stats['exceeded']}，{stats['nodes']} 個節點），題目可能有數字辨識錯誤。")
+            else:
+                print("警告", "唯一解檢查超過搜尋預算，題目可能有數字辨識錯誤，已取消自動填入。")
+        elif result['status'] == 'unsolvable':
+            print("錯誤", "此數獨題目無解！")
+        else:
+            solution_grid = result['solution']
+            auto_fill, show_result = self.run_in_ui(
+                lambda: (self.auto_fill_var.get(), self.show_result_var.get()))
+            if auto_fill:
                 # 自動填入答案
                 self.auto_fill_solution(sudoku_grid, solution_grid)
-            elif self.show_result_var.get():
-                # 清除舊的結果
-                self.result_text.delete('1.0', tk.END)
-                
-                # 顯示原始題目
-                self.result_text.insert(tk.END, "原始題目：\n")
-                for i in range(9):
-                    for j in range(9):
-                        self.result_text.insert(tk.END, str(sudoku_grid[i][j]) + " ")
-                    self.result_text.insert(tk.END, "\n")
-                
-                self.result_text.insert(tk.END, "\n解答：\n")
-                for i in range(9):
-                    for j in range(9):
-                        self.result_text.insert(tk.END, str(solution_grid[i][j]) + " ")
-                    self.result_text.insert(tk.END, "\n")
-                
-                # 顯示結果區域
-                self.result_frame.grid()
-                self.root.update_idletasks()
-                new_height = self.root.winfo_reqheight()
-                self.root.geometry(f"{window_width}x{new_height}")
+            elif show_result:
+                # 介面更新交回Tk主執行緒
+                self.root.after(0, self.display_result, sudoku_grid, solution_grid)
             else:
                 # 只進行截圖，不做其他操作
-                self.result_frame.grid_remove()
-        else:
-            print("錯誤", "此數獨題目無解！")
+                self.root.after(0, self.result_frame.grid_remove)
+
+    def display_result(self, sudoku_grid, solution_grid):
+        """在結果區域顯示原始題目與解答（於Tk主執行緒執行）"""
+        # 清除舊的結果
+        self.result_text.delete('1.0', tk.END)
+        
+        # 顯示原始題目
+        self.result_text.insert(tk.END, "原始題目：\n")
+        for i in range(9):
+            for j in range(9):
+                self.result_text.insert(tk.END, str(sudoku_grid[i][j]) + " ")
+            self.result_text.insert(tk.END, "\n")
+        
+        self.result_text.insert(tk.END, "\n解答：\n")
+        for i in range(9):
+            for j in range(9):
+                self.result_text.insert(tk.END, str(solution_grid[i][j]) + " ")
+            self.result_text.insert(tk.END, "\n")
+        
+        # 顯示結果區域
+        self.result_frame.grid()
+        self.root.update_idletasks()
+        new_height = self.root.winfo_reqheight()
+        self.root.geometry(f"{window_width}x{new_height}")
     
     def import_from_image(self):
         """從本地圖片檔案導入數獨題目"""
-        try:
-            file_path = filedialog.askopenfilename(
-                title="選擇數獨圖片",
-                filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp")]
-            )
-            if not file_path:
-                return
-                
-            # 載入圖片
-            img = Image.open(file_path)
-            img_array = np.array(img)
-            
-            # 進行數字識別
-            results = self.model(img_array)
-            if not results:
-                print("警告", "未能識別到任何數字，請確保圖片包含完整的數獨題目。")
-                return
-                
-            # 顯示識別結果並直接解題
-            self.show_result(results, file_path)
+        file_path = filedialog.askopenfilename(
+            title="選擇數獨圖片",
+            filetypes=[("Image files", "*.jpg *.jpeg *.png *.bmp")]
+        )
+        if file_path:
+            # 辨識與解題交給背景執行器
+            self.executor.submit(self.process_image_file, file_path)
 
-        except Exception as e:
-            print("錯誤", f"圖片處理失敗: {str(e)}")
+    def process_image_file(self, file_path):
+        """辨識圖片檔案並解題（於背景執行緒執行）"""
+        with self.tracer.frame('file'):
+            try:
+                # 載入圖片
+                with self.tracer.span('load'):
+                    img_array = to_image_array(file_path)
+
+                # 進行數字識別
+                with self.tracer.span('recognize'):
+                    cells = self.pipeline.recognize_cells(img_array)
+                if cells is None:
+                    print("警告", "未能識別到任何數字，請確保圖片包含完整的數獨題目。")
+                    return
+
+                # 顯示識別結果並直接解題
+                self.show_result(cells[0], file_path, cells[1])
+
+            except Exception as e:
+                print("錯誤", f"圖片處理失敗: {str(e)}")
             
     def run(self):
         self.root.mainloop()
+        self.watcher.stop()
+        self.solution_cache.save()
+        self.screenshot_writer.close()
 
 if __name__ == "__main__":
-    app = ScreenshotApp()
+    # --startup-time：輸出視窗顯示與模型就緒的耗時後結束
+    app = ScreenshotApp(measure_startup='--startup-time' in sys.argv)
     app.run()
@@ -0,0 +1,268 @@
+import io
+import os
+import threading
+import time
+
+from solver import DEFAULT_SOLVER, SOLVED, UNSOLVABLE, BUDGET_EXCEEDED, BudgetExceeded, create_solver, count_solutions
+from solution_cache import SolutionCache
+
+
+# 推理後端與對應的模型檔案（由export_model.py匯出）
+MODEL_BACKENDS = {
+    'pytorch': 'sudoku.pt',
+    'onnx': 'sudoku.onnx',
+    'openvino': 'sudoku_openvino_model',
+    'openvino-int8': 'sudoku_int8_openvino_model',
+}
+DEFAULT_BACKEND = 'pytorch'
+
+
+def default_model_path(backend=DEFAULT_BACKEND):
+    """取得推理後端的模型路徑，優先使用程式所在目錄的模型"""
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"未知的推理後端: {backend}，可用: {', '.join(MODEL_BACKENDS)}")
+    model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), MODEL_BACKENDS[backend])
+    if not os.path.exists(model_path):
+        model_path = MODEL_BACKENDS[backend]  # 回退到當前目錄
+    return model_path
+
+
+def to_image_array(image):
+    """將圖片路徑、編碼後的圖片位元組、PIL Image或numpy陣列統一轉換為numpy陣列"""
+    import numpy as np
+    if isinstance(image, str):
+        from PIL import Image
+        image = Image.open(image)
+    elif isinstance(image, (bytes, bytearray)):
+        from PIL import Image
+        image = Image.open(io.BytesIO(image)).convert('RGB')
+    return np.asarray(image)
+
+
+def _to_numpy(tensor):
+    """將torch張量（或其他陣列）轉換為numpy陣列"""
+    import numpy as np
+    if hasattr(tensor, 'cpu'):
+        tensor = tensor.cpu().numpy()
+    return np.asarray(tensor)
+
+
+def map_detections(xywh, cls, conf, orig_shape, offset=(0, 0)):
+    """將整批偵測框一次映射到9x9網格，同一格有多個偵測時取信心度最高者
+
+    orig_shape為整個題目區域的(高, 寬)；偵測來自裁切區域時，offset為裁切左上角(x, y)。
+    返回(網格, 信心度矩陣)，沒有偵測到數字的格子信心度為0。
+    """
+    import numpy as np
+    xywh, cls, conf = _to_numpy(xywh).reshape(-1, 4), _to_numpy(cls).reshape(-1), _to_numpy(conf).reshape(-1)
+
+    # 以中心點計算在9x9網格中的位置
+    grid_x = ((xywh[:, 0] + offset[0]) * 9 / orig_shape[1]).astype(int)
+    grid_y = ((xywh[:, 1] + offset[1]) * 9 / orig_shape[0]).astype(int)
+    inside = (grid_x >= 0) & (grid_x < 9) & (grid_y >= 0) & (grid_y < 9)
+    cell = (grid_y * 9 + grid_x)[inside]
+    cls, conf = cls[inside].astype(int), conf[inside]
+
+    # 依格子排序、同格內信心度由高到低，取每格第一個偵測
+    order = np.lexsort((-conf, cell))
+    _, first = np.unique(cell[order], return_index=True)
+    pick = order[first]
+
+    grid = np.zeros(81, dtype=int)
+    confidence = np.zeros(81, dtype=float)
+    grid[cell[pick]] = cls[pick]
+    confidence[cell[pick]] = conf[pick]
+    return grid.reshape(9, 9).tolist(), confidence.reshape(9, 9).tolist()
+
+
+def results_to_cells(results, orig_shape=None, offset=(0, 0)):
+    """將YOLO辨識結果轉換為(9x9網格, 9x9信心度矩陣)
+
+    辨識的是裁切區域時，以orig_shape指定整個題目區域的尺寸、offset指定裁切位置。
+    """
+    import numpy as np
+    xywh, cls, conf = [], [], []
+    shape = None
+    for r in results:
+        xywh.append(_to_numpy(r.boxes.xywh).reshape(-1, 4))
+        cls.append(_to_numpy(r.boxes.cls).reshape(-1))
+        conf.append(_to_numpy(r.boxes.conf).reshape(-1))
+        shape = r.orig_shape
+    if shape is None:
+        return [[0] * 9 for _ in range(9)], [[0.0] * 9 for _ in range(9)]
+    return map_detections(np.concatenate(xywh), np.concatenate(cls), np.concatenate(conf),
+                          orig_shape or shape, offset)
+
+
+def has_detections(results):
+    """YOLO辨識結果中是否有任何偵測框"""
+    return any(len(r.boxes) for r in results)
+
+
+def results_to_grid(results):
+    """將YOLO辨識結果轉換為9x9網格"""
+    return results_to_cells(results)[0]
+
+
+class SudokuPipeline:
+    """不依賴GUI與輸入裝置的辨識解題流程，模型在第一次辨識時才載入"""
+    def __init__(self, model_path=None, solver_name=DEFAULT_SOLVER, cache=None, backend=DEFAULT_BACKEND,
+                 cell_cache=None, max_nodes=None, max_time=None):
+        self.backend = backend
+        self.max_nodes = max_nodes                 # 每題搜尋節點數上限，None表示不限制
+        self.max_time = max_time                   # 每題搜尋時間上限（秒），None表示不限制
+        self.cell_cache = cell_cache               # 格子辨識快取（CellCache），None表示每次都完整推理
+        self.model_path = model_path or default_model_path(backend)
+        self.solver_name = solver_name
+        self.cache = cache if cache is not None else SolutionCache()
+        self._model = None
+        self._model_lock = threading.Lock()        # 保護_model與_model_generation
+        self._load_lock = threading.Lock()         # 背景預載與辨識同時要求模型時只載入一次
+        self._model_generation = 0                 # 每次切換後端加一，舊後端載入完成的模型不再採用
+
+    @property
+    def model(self):
+        """取得YOLO模型，尚未載入時立即載入（其他執行緒載入中則等待完成）"""
+        model = self._model
+        return model if model is not None else self.load_model()
+
+    @property
+    def is_loaded(self):
+        """模型是否已載入"""
+        return self._model is not None
+
+    def load_model(self):
+        """載入YOLO模型（PyTorch權重或匯出的ONNX/OpenVINO模型）
+
+        載入期間若已切換後端，載入的模型只交給這次的呼叫者，不會覆蓋新後端的模型。
+        """
+        from ultralytics import YOLO
+        with self._load_lock:
+            with self._model_lock:
+                if self._model is not None:
+                    return self._model  # 等待期間其他執行緒已載入
+                generation, model_path = self._model_generation, self.model_path
+            model = YOLO(model_path, task='detect')
+            with self._model_lock:
+                if generation == self._model_generation:
+                    self._model = model
+            return model
+
+    def warm_up(self, size=480):
+        """載入模型並以空白圖片執行一次推理，讓第一次辨識不必等待初始化，返回耗時（秒）"""
+        import numpy as np
+        start = time.perf_counter()
+        self.model(np.full((size, size, 3), 255, dtype=np.uint8), verbose=False)
+        return time.perf_counter() - start
+
+    def set_backend(self, backend):
+        """切換推理後端，模型在下次使用時重新載入"""
+        with self._model_lock:
+            self.model_path = default_model_path(backend)
+            self.backend = backend
+            self._model = None
+            self._model_generation += 1
+        if self.cell_cache is not None:
+            self.cell_cache.clear()  # 不同模型的辨識結果不共用
+
+    def detect(self, image):
+        """對圖片執行YOLO推理，返回原始辨識結果"""
+        return self.model(to_image_array(image))
+
+    def recognize(self, image):
+        """辨識圖片中的數獨題目，返回9x9網格，未辨識到任何結果時返回None"""
+        cells = self.recognize_cells(image)
+        return cells[0] if cells else None
+
+    def recognize_cells(self, image):
+        """辨識圖片中的數獨題目，返回(9x9網格, 9x9信心度矩陣)，未辨識到任何結果時返回None"""
+        if self.cell_cache is not None:
+            return self.cell_cache.recognize(self, to_image_array(image))
+        results = self.detect(image)
+        if not has_detections(results):
+            return None
+        return results_to_cells(results)
+
+    def recognize_batch(self, images):
+        """以單次YOLO推理辨識多張圖片，依輸入順序返回各自的9x9網格，沒有偵測到任何數字的圖片為None"""
+        results = self.model([to_image_array(image) for image in images])
+        return [results_to_grid([r]) if has_detections([r]) else None for r in results]
+
+    def is_unique(self, grid):
+        """檢查題目是否恰好只有一組解"""
+        return count_solutions(grid, limit=2) == 1
+
+    def solve(self, grid):
+        """求解題目，返回新的解答網格，無解或超過搜尋預算時返回None；不會修改傳入的grid"""
+        return self.solve_with_stats(grid)[0]
+
+    def solve_with_stats(self, grid):
+        """求解題目，返回(解答網格或None, 搜尋統計)；統計的status為solved、unsolvable或budget_exceeded
+
+        先查詢解答快取；未經唯一解檢查的題目不會存入快取（由check_and_solve存入）。
+        """
+        cached = self.cache.get(grid)
+        if cached is not None:
+            return cached, self._cached_stats()
+        return self._search(grid)
+
+    def _search(self, grid):
+        """以解題引擎搜尋，返回(解答網格或None, 搜尋統計)"""
+        solution = [row[:] for row in grid]
+        solver = create_solver(self.solver_name, self.max_nodes, self.max_time)
+        solved = solver.solve(solution)
+        stats = solver.stats()
+        stats['phase'] = 'search'
+        return (solution if solved else None), stats
+
+    def _cached_stats(self):
+        """快取命中時的搜尋統計（未執行搜尋）"""
+        stats = create_solver(self.solver_name).stats()
+        stats.update(status=SOLVED, cached=True, phase='cache')
+        return stats
+
+    def _count_stats(self, status, exceeded=None):
+        """在唯一解檢查階段就結束時的統計（未執行搜尋）"""
+        stats = create_solver(self.solver_name).stats()
+        stats.update(status=status, exceeded=exceeded, phase='count')
+        return stats
+
+    def process(self, image):
+        """完整執行辨識與解題，返回包含狀態、題目與解答的字典
+
+        狀態為 'ok'、'no_detection'（未辨識到數字）、'multiple'（多組解，可能辨識錯誤）、
+        'unsolvable'（無解）或 'budget_exceeded'（超過搜尋預算，題目多半辨識錯誤）。
+        """
+        grid = self.recognize(image)
+        if grid is None:
+            return {'status': 'no_detection', 'grid': None, 'solution': None}
+        return self.check_and_solve(grid)
+
+    def check_and_solve(self, grid):
+        """檢查題目解答數量後求解，返回與process相同格式的字典，另以'stats'附上搜尋統計
+
+        stats['phase'] 標示結果來自哪個階段：'cache'（快取命中）、'count'（唯一解檢查）或 'search'（解題引擎）。
+
+        先查詢解答快取：快取中的題目存入前都已確認唯一解，命中時不必再做唯一解檢查與搜尋。
+        解答數量為0時直接返回 'unsolvable'，只有唯一解的題目才交給選定的解題引擎。
+        """
+        cached = self.cache.get(grid)
+        if cached is not None:
+            return {'status': 'ok', 'grid': grid, 'solution': cached, 'stats': self._cached_stats()}
+        try:
+            count = count_solutions(grid, 2, self.max_nodes, self.max_time)
+        except BudgetExceeded as e:
+            return {'status': BUDGET_EXCEEDED, 'grid': grid, 'solution': None,
+                    'stats': self._count_stats(BUDGET_EXCEEDED, e.args[0])}
+        if count > 1:
+            return {'status': 'multiple', 'grid': grid, 'solution': None, 'stats': self._count_stats('multiple')}
+        if count == 0:
+            # 無解（例如誤判的數字與其他數字衝突）時不再交給解題引擎搜尋
+            return {'status': 'unsolvable', 'grid': grid, 'solution': None, 'stats': self._count_stats(UNSOLVABLE)}
+        solution, stats = self._search(grid)
+        if solution is not None:
+            self.cache.put(grid, solution)
+            status = 'ok'
+        else:
+            status = BUDGET_EXCEEDED if stats['status'] == BUDGET_EXCEEDED else 'unsolvable'
+        return {'status': status, 'grid': grid, 'solution': solution, 'stats': stats}
@@ -0,0 +1,44 @@
+import threading
+
+
+class PipelineExecutor:
+    """在背景執行緒執行截圖→辨識→解題流程，同時只允許一個工作，忙碌期間的新請求合併為一次"""
+    def __init__(self, name='pipeline'):
+        self.name = name
+        self.lock = threading.Lock()
+        self.busy = False
+        self.pending = None                        # 忙碌期間最後一次的請求
+        self.completed = 0
+        self.coalesced = 0                         # 被合併掉的請求數
+
+    def submit(self, func, *args):
+        """提交工作，閒置時立即在背景執行並返回True；忙碌時只保留最後一次請求並返回False"""
+        with self.lock:
+            if self.busy:
+                if self.pending is not None:
+                    self.coalesced += 1
+                self.pending = (func, args)
+                return False
+            self.busy = True
+        threading.Thread(target=self._run, args=(func, args), name=self.name, daemon=True).start()
+        return True
+
+    def _run(self, func, args):
+        """依序執行工作，完成後若有待處理的請求則接著執行"""
+        while True:
+            try:
+                func(*args)
+            except Exception as e:
+                print("錯誤", f"背景工作失敗: {str(e)}")
+            with self.lock:
+                self.completed += 1
+                if self.pending is None:
+                    self.busy = False
+                    return
+                func, args = self.pending
+                self.pending = None
+
+    def is_busy(self):
+        """是否有工作正在執行"""
+        with self.lock:
+            return self.busy
@@ -1,16 +1,21 @@
+import argparse
+import json
 import os
-from inference_sdk import InferenceHTTPClient
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from screenshot_writer import IMAGE_EXTENSIONS
+#自動標註 將img資料夾中的截圖轉為YOLO格式的標籤
+
+MANIFEST_NAME = 'labels_manifest.json'     # 標註進度記錄，中斷後可接續
 
-CLIENT = InferenceHTTPClient(
-    api_url="https://detect.roboflow.com",
-    api_key="這裡輸入API_KEY"
-)
 
 def convert_to_yolo(result):
     """Convert detection results to YOLO format."""
     img_width = result['image']['width']
     img_height = result['image']['height']
-    
+
     yolo_annotations = []
     for pred in result['predictions']:
         # 歸一化座標
@@ -19,37 +24,176 @@ def convert_to_yolo(result):
         width = pred['width'] / img_width
         height = pred['height'] / img_height
         class_id = pred['class_id']
-        
+
         # YOLO格式: <class> <x_center> <y_center> <width> <height>
         yolo_line = f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}"
         yolo_annotations.append(yolo_line)
-    
+
+    return yolo_annotations
+
+
+def results_to_yolo(results):
+    """將ultralytics的辨識結果轉換為YOLO格式的標註行"""
+    yolo_annotations = []
+    for result in results:
+        boxes = result.boxes
+        for (x_center, y_center, width, height), class_id in zip(boxes.xywhn.tolist(), boxes.cls.tolist()):
+            yolo_annotations.append(f"{int(class_id)} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}")
     return yolo_annotations
 
-def process_image(img_path):
-    """處理單張圖片並保存YOLO格式的標註"""
-    print(f"Processing {img_path}...")
-    
-    # 進行推理
-    result = CLIENT.infer(img_path, model_id="digits-zv0yj/1")
-    
-    # 轉換為YOLO格式
-    yolo_annotations = convert_to_yolo(result)
-    
-    # 保存到對應的txt文件
+
+class RoboflowLabeler:
+    """以Roboflow推理API標註；api_url可指向本機的Roboflow Inference伺服器"""
+    def __init__(self, api_key=None, model_id="digits-zv0yj/1", api_url="https://detect.roboflow.com"):
+        self.api_key = api_key or os.environ.get('ROBOFLOW_API_KEY', "這裡輸入API_KEY")
+        self.model_id = model_id
+        self.api_url = api_url
+        self.name = f"roboflow:{model_id}"
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from inference_sdk import InferenceHTTPClient
+            self._client = InferenceHTTPClient(api_url=self.api_url, api_key=self.api_key)
+        return self._client
+
+    def label(self, img_path):
+        """返回圖片的YOLO格式標註行"""
+        return convert_to_yolo(self.client.infer(img_path, model_id=self.model_id))
+
+
+class LocalModelLabeler:
+    """以本機YOLO模型（預設sudoku.pt）標註，不需要網路與API金鑰"""
+    def __init__(self, model_path='sudoku.pt', conf=0.5):
+        from pipeline import SudokuPipeline
+        self.pipeline = SudokuPipeline(model_path=model_path)
+        self.conf = conf
+        self.name = f"local:{os.path.basename(model_path)}"
+        self.lock = threading.Lock()               # 同一個模型不同時推理，其他執行緒仍可讀寫檔案
+
+    def label(self, img_path):
+        """返回圖片的YOLO格式標註行"""
+        with self.lock:
+            results = self.pipeline.model(img_path, conf=self.conf, verbose=False)
+        return results_to_yolo(results)
+
+
+# 可選用的標註來源
+LABELERS = {
+    'roboflow': RoboflowLabeler,
+    'local': LocalModelLabeler,
+}
+
+
+def _image_signature(img_path):
+    """圖片的大小與修改時間，用於判斷標註是否需要更新"""
+    stat = os.stat(img_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_manifest(path):
+    """讀取標註進度記錄"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print("警告", f"標註記錄讀取失敗，將重新建立: {str(e)}")
+        return {}
+
+
+def save_manifest(manifest, path):
+    """先寫入暫存檔再取代，中斷時不會留下損壞的記錄"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(img_path, manifest, labeler_name):
+    """標註檔存在且對應目前的圖片與標註來源時返回True
+
+    沒有記錄的舊標註（先前執行或手動標註）只要比圖片新就視為最新，不會被覆蓋。
+    """
+    txt_path = os.path.splitext(img_path)[0] + '.txt'
+    if not os.path.exists(txt_path):
+        return False
+    entry = manifest.get(os.path.basename(img_path))
+    if entry is None:
+        return os.path.getmtime(txt_path) >= os.path.getmtime(img_path)
+    size, mtime_ns = _image_signature(img_path)
+    return entry['size'] == size and entry['mtime_ns'] == mtime_ns and entry['labeler'] == labeler_name
+
+
+def process_image(img_path, labeler):
+    """處理單張圖片並保存YOLO格式的標註，返回標註行數"""
+    yolo_annotations = labeler.label(img_path)
+
+    # 先寫入暫存檔再取代，避免中斷時留下不完整的標註
     txt_path = os.path.splitext(img_path)[0] + '.txt'
-    with open(txt_path, 'w', encoding='utf-8') as f:
+    tmp_path = txt_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(yolo_annotations))
-    
-    print(f"Saved annotations to {txt_path}")
+    os.replace(tmp_path, txt_path)
+    return len(yolo_annotations)
+
+
+def label_directory(img_dir, labeler, workers=8, force=False, save_every=20):
+    """以有限的並行數標註資料夾中尚未標註或已過期的截圖，返回(完成數, 略過數, 失敗數)"""
+    manifest_path = os.path.join(img_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    images = sorted(os.path.join(img_dir, name) for name in os.listdir(img_dir)
+                    if name.lower().endswith(IMAGE_EXTENSIONS))
+    pending = [path for path in images if force or not is_up_to_date(path, manifest, labeler.name)]
+    skipped = len(images) - len(pending)
+    print(f"共 {len(images)} 張圖片，{skipped} 張已是最新，需標註 {len(pending)} 張")
+
+    done = failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_image, path, labeler): path for path in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                boxes = future.result()
+            except Exception as e:
+                failed += 1
+                print("錯誤", f"{path} 標註失敗: {str(e)}")
+                continue
+            size, mtime_ns = _image_signature(path)
+            manifest[os.path.basename(path)] = {'size': size, 'mtime_ns': mtime_ns, 'labeler': labeler.name,
+                                                'boxes': boxes, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            done += 1
+            if done % save_every == 0:
+                save_manifest(manifest, manifest_path)
+                elapsed = time.perf_counter() - start
+                print(f"已完成 {done}/{len(pending)}（{done / elapsed:.1f} 張/秒）")
+    save_manifest(manifest, manifest_path)
+    return done, skipped, failed
+
 
 def main():
-    # 遍歷./img目錄下的所有PNG圖片
-    img_dir = './img'
-    for filename in os.listdir(img_dir):
-        if filename.endswith('.png'):
-            img_path = os.path.join(img_dir, filename)
-            process_image(img_path)
+    parser = argparse.ArgumentParser(description="自動標註img資料夾中的截圖（可中斷後接續）")
+    parser.add_argument('--img-dir', default='./img', help="圖片資料夾")
+    parser.add_argument('--labeler', default='roboflow', choices=list(LABELERS), help="標註來源")
+    parser.add_argument('--api-key', default=None, help="Roboflow API金鑰（預設讀取ROBOFLOW_API_KEY環境變數）")
+    parser.add_argument('--api-url', default="https://detect.roboflow.com",
+                        help="Roboflow推理API位址，可改為本機Inference伺服器，例如 http://localhost:9001")
+    parser.add_argument('--model-id', default="digits-zv0yj/1", help="Roboflow模型ID")
+    parser.add_argument('--model', default='sudoku.pt', help="local標註使用的模型")
+    parser.add_argument('--workers', type=int, default=8, help="同時處理的圖片數")
+    parser.add_argument('--force', action='store_true', help="重新標註所有圖片")
+    args = parser.parse_args()
+
+    if args.labeler == 'roboflow':
+        labeler = RoboflowLabeler(args.api_key, args.model_id, args.api_url)
+    else:
+        labeler = LocalModelLabeler(args.model)
+    done, skipped, failed = label_directory(args.img_dir, labeler, args.workers, args.force)
+    print(f"標註完成：新增 {done} 張，略過 {skipped} 張，失敗 {failed} 張")
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,95 @@
+import os
+import queue
+import random
+import string
+import threading
+
+# 支援的保存格式與PIL參數
+SAVE_FORMATS = {
+    'png': ('PNG', '.png'),
+    'jpg': ('JPEG', '.jpg'),
+    'webp': ('WEBP', '.webp'),
+}
+# 標註、分割、去除重複等數據集工具共用的圖片副檔名，涵蓋所有保存格式
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def random_string(length):
+    """生成指定長度的隨機字串"""
+    letters = string.ascii_letters + string.digits
+    return ''.join(random.choice(letters) for _ in range(length))
+
+
+class ScreenshotWriter:
+    """在背景執行緒保存截圖，佇列已滿時直接捨棄，不讓辨識與自動填入等待磁碟"""
+    def __init__(self, directory='img', fmt='png', compress_level=1, quality=90, max_backlog=8, enabled=True):
+        if fmt not in SAVE_FORMATS:
+            raise ValueError(f"不支援的保存格式: {fmt}，可用: {', '.join(SAVE_FORMATS)}")
+        self.directory = directory
+        self.fmt = fmt
+        self.compress_level = compress_level       # PNG壓縮等級（0~9，越小越快）
+        self.quality = quality                     # JPEG/WEBP品質
+        self.enabled = enabled
+        self.queue = queue.Queue(maxsize=max_backlog)
+        self.prefix = random_string(6)             # 本次執行的檔名前綴
+        self.counter = 0
+        self.saved = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _next_filename(self):
+        """產生下一個檔名，格式為隨機6字元前綴加上序號"""
+        self.counter += 1
+        return os.path.join(self.directory, f"{self.prefix}_{self.counter:03d}{SAVE_FORMATS[self.fmt][1]}")
+
+    def submit(self, image):
+        """將截圖放入保存佇列並立即返回預定檔名；停用或佇列已滿時返回None"""
+        if not self.enabled:
+            return None
+        filename = self._next_filename()
+        try:
+            self.queue.put_nowait((image, filename))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return filename
+
+    def _run(self):
+        """背景執行緒：依序將佇列中的截圖寫入磁碟"""
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self._save(*item)
+            except Exception as e:
+                print("錯誤", f"截圖保存失敗: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def _save(self, image, filename):
+        """寫入單張截圖，檔名已存在時加上隨機後綴"""
+        os.makedirs(self.directory, exist_ok=True)
+        pil_format = SAVE_FORMATS[self.fmt][0]
+        options = {'compress_level': self.compress_level} if pil_format == 'PNG' else {'quality': self.quality}
+        if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        while True:
+            try:
+                with open(filename, 'xb') as f:
+                    image.save(f, format=pil_format, **options)
+                break
+            except FileExistsError:
+                base, ext = os.path.splitext(filename)
+                filename = f"{base}_{random_string(4)}{ext}"
+        self.saved += 1
+
+    def flush(self):
+        """等待佇列中的截圖全部寫入"""
+        self.queue.join()
+
+    def close(self):
+        """寫完剩餘截圖後停止背景執行緒"""
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,217 @@
+import argparse
+import asyncio
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from solver import SOLVERS, DEFAULT_SOLVER, parse_puzzle, format_grid
+from pipeline import SudokuPipeline, MODEL_BACKENDS, DEFAULT_BACKEND, to_image_array
+
+MAX_BODY_SIZE = 32 * 1024 * 1024           # 單一請求內容上限
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+               500: 'Internal Server Error'}
+
+
+def _ms(seconds):
+    """秒轉換為毫秒（保留三位小數）"""
+    return round(seconds * 1000, 3)
+
+
+def decode_image(data):
+    """將base64圖片解碼為numpy陣列，格式錯誤時拋出ValueError（回應400）"""
+    try:
+        return to_image_array(base64.b64decode(data))
+    except (ValueError, OSError) as e:
+        raise ValueError(f"無法解碼圖片: {str(e)}")
+
+
+class MicroBatcher:
+    """將同時到達的圖片請求合併成微批次，以單次YOLO推理處理"""
+    def __init__(self, infer_batch, max_batch_size=8, max_wait=0.01):
+        self.infer_batch = infer_batch                 # 接收圖片列表、返回網格列表的同步函數
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait                       # 收集同批請求的最長等待秒數
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self.batches = 0
+        self.images = 0
+
+    async def submit(self, image):
+        """送出一張圖片，等待辨識完成後返回(網格, 計時資訊)"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, time.perf_counter(), future))
+        return await future
+
+    async def run(self):
+        """持續收集請求並分批推理"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            start = time.perf_counter()
+            try:
+                grids = await loop.run_in_executor(self.executor, self.infer_batch, [item[0] for item in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.images += len(batch)
+
+            for (_, queued_at, future), grid in zip(batch, grids):
+                if not future.done():
+                    future.set_result((grid, {
+                        'queue_ms': _ms(start - queued_at),
+                        'inference_ms': _ms(elapsed),
+                        'batch_size': len(batch),
+                    }))
+
+
+class SolveServer:
+    """本機HTTP解題服務，保持模型常駐供多個客戶端使用"""
+    def __init__(self, pipeline, max_batch_size=8, max_wait=0.01):
+        self.pipeline = pipeline
+        self.batcher = MicroBatcher(pipeline.recognize_batch, max_batch_size, max_wait)
+        self.decode_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='decode')
+        self.solve_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='solve')
+        self.requests = 0
+
+    async def solve_request(self, payload):
+        """處理解題請求，payload為JSON物件：{"grid": "81字元"} 或 {"image": "base64圖片"}"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        timings = {}
+        if 'grid' in payload:
+            grid = parse_puzzle(payload['grid'])
+        elif 'image' in payload:
+            # 逐一解碼，格式錯誤的圖片只讓該請求失敗，不會拖累同批的其他請求
+            image = await loop.run_in_executor(self.decode_executor, decode_image, payload['image'])
+            timings['decode_ms'] = _ms(time.perf_counter() - start)
+            grid, batch_timings = await self.batcher.submit(image)
+            timings.update(batch_timings)
+            if grid is None:
+                timings['total_ms'] = _ms(time.perf_counter() - start)
+                return {'status': 'no_detection', 'grid': None, 'solution': None, 'timings': timings,
+                        'search': None}
+        else:
+            raise ValueError("請求必須包含 grid 或 image 欄位")
+
+        solve_start = time.perf_counter()
+        result = await loop.run_in_executor(self.solve_executor, self.pipeline.check_and_solve, grid)
+        timings['solve_ms'] = _ms(time.perf_counter() - solve_start)
+        timings['total_ms'] = _ms(time.perf_counter() - start)
+        return {
+            'status': result['status'],
+            'grid': format_grid(result['grid']),
+            'solution': format_grid(result['solution']) if result['solution'] else None,
+            'timings': timings,
+            'search': result['stats'],
+        }
+
+    async def dispatch(self, method, path, headers, body):
+        """依路徑分派請求，返回(狀態碼, JSON物件)"""
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/stats':
+            return 200, {
+                'requests': self.requests,
+                'batches': self.batcher.batches,
+                'images': self.batcher.images,
+                'cache': self.pipeline.cache.stats(),
+            }
+        if method == 'POST' and path == '/solve':
+            if headers.get('content-type', '').startswith('image/'):
+                payload = {'image': base64.b64encode(body).decode('ascii')}
+            else:
+                payload = json.loads(body or b'{}')
+            return 200, await self.solve_request(payload)
+        return 404, {'error': f"找不到路徑: {method} {path}"}
+
+    async def handle(self, reader, writer):
+        """處理單一HTTP連線（每個連線一個請求）"""
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0].upper(), request_line[1]
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY_SIZE:
+                status, payload = 413, {'error': "請求內容過大"}
+            else:
+                body = await reader.readexactly(length) if length else b''
+                self.requests += 1
+                try:
+                    status, payload = await self.dispatch(method, path, headers, body)
+                except (ValueError, KeyError) as e:
+                    status, payload = 400, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                         f"Content-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """啟動服務並持續執行"""
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"解題服務已啟動: http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本機數獨辨識解題服務")
+    parser.add_argument('--host', default='127.0.0.1', help="監聽位址（預設僅限本機）")
+    parser.add_argument('--port', type=int, default=8765, help="監聽埠號")
+    parser.add_argument('--model', default=None, help="模型路徑，預設依推理後端決定")
+    parser.add_argument('--backend', default=DEFAULT_BACKEND, choices=list(MODEL_BACKENDS), help="推理後端")
+    parser.add_argument('--solver', default=DEFAULT_SOLVER, choices=list(SOLVERS), help="解題引擎")
+    parser.add_argument('--max-nodes', type=int, default=None, help="每題搜尋節點數上限")
+    parser.add_argument('--max-time', type=float, default=2.0, help="每題搜尋時間上限（秒），0表示不限制")
+    parser.add_argument('--max-batch-size', type=int, default=8, help="單次推理最多合併的圖片數")
+    parser.add_argument('--max-wait-ms', type=float, default=10.0, help="收集同批請求的最長等待毫秒數")
+    args = parser.parse_args()
+
+    pipeline = SudokuPipeline(model_path=args.model, solver_name=args.solver, backend=args.backend,
+                              max_nodes=args.max_nodes, max_time=args.max_time or None)
+    pipeline.load_model()
+    server = SolveServer(pipeline, args.max_batch_size, args.max_wait_ms / 1000)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+import os
+from collections import OrderedDict
+
+
+def _order_lines(src, rounds=2):
+    """依不受數字重編與行列交換影響的特徵，決定行與列（含大行、大列）的排列順序"""
+    # 格子特徵：該數字在整個題目中出現的次數
+    freq = {}
+    for row in src:
+        for num in row:
+            if num:
+                freq[num] = freq.get(num, 0) + 1
+    givens = [(r, c, freq[src[r][c]]) for r in range(9) for c in range(9) if src[r][c]]
+
+    # 反覆以對方的特徵細化行與列的特徵
+    row_sig = [()] * 9
+    col_sig = [()] * 9
+    for _ in range(rounds):
+        new_rows = [[] for _ in range(9)]
+        new_cols = [[] for _ in range(9)]
+        for r, c, f in givens:
+            new_rows[r].append((f, col_sig[c]))
+            new_cols[c].append((f, row_sig[r]))
+        row_sig = [tuple(sorted(items)) for items in new_rows]
+        col_sig = [tuple(sorted(items)) for items in new_cols]
+
+    def order(sig):
+        # 先排序每個3行（列）群組內部，再排序群組本身；特徵相同時保留原順序
+        groups = [sorted(range(g * 3, g * 3 + 3), key=sig.__getitem__) for g in range(3)]
+        groups.sort(key=lambda lines: [sig[i] for i in lines])
+        return [i for lines in groups for i in lines]
+
+    return order(row_sig), order(col_sig)
+
+
+def canonicalize(grid):
+    """將題目轉換為標準型，返回(81字元鍵值, 轉換資訊)
+
+    標準型考慮轉置、大行/大列交換、群組內行列交換與數字重編。排序特徵相同時保留原順序，
+    因此並非完整的最小字典序標準型：部分等價題目可能得到不同鍵值，但只會造成快取未命中。
+    """
+    best = None
+    for transposed in (False, True):
+        src = [list(col) for col in zip(*grid)] if transposed else grid
+        row_order, col_order = _order_lines(src)
+
+        # 依讀取順序首次出現的先後重新編號數字
+        relabel = {}
+        cells = []
+        for r in row_order:
+            for c in col_order:
+                num = src[r][c]
+                if num and num not in relabel:
+                    relabel[num] = len(relabel) + 1
+                cells.append(relabel.get(num, 0))
+        for num in range(1, 10):
+            if num not in relabel:
+                relabel[num] = len(relabel) + 1
+
+        key = ''.join(map(str, cells))
+        if best is None or key < best[0]:
+            best = (key, (transposed, row_order, col_order, relabel))
+    return best
+
+
+def restore_solution(solution_key, transform):
+    """將標準型空間的81字元解答還原為原題目座標與數字的9x9網格"""
+    transposed, row_order, col_order, relabel = transform
+    inverse = {label: num for num, label in relabel.items()}
+    grid = [[0] * 9 for _ in range(9)]
+    for i, r in enumerate(row_order):
+        for j, c in enumerate(col_order):
+            num = inverse[int(solution_key[i * 9 + j])]
+            if transposed:
+                grid[c][r] = num
+            else:
+                grid[r][c] = num
+    return grid
+
+
+def _to_canonical_solution(solution, transform):
+    """將原座標的解答轉換至標準型空間的81字元字串"""
+    transposed, row_order, col_order, relabel = transform
+    src = [list(col) for col in zip(*solution)] if transposed else solution
+    return ''.join(str(relabel[src[r][c]]) for r in row_order for c in col_order)
+
+
+class SolutionCache:
+    """以題目標準型為鍵的解答快取，超過容量時淘汰最久未使用的項目，可選擇保存至磁碟"""
+    def __init__(self, max_size=1024, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.entries = OrderedDict()               # 標準型題目 -> 標準型解答
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def get(self, grid):
+        """查詢快取，命中時返回原座標的解答網格，否則返回None"""
+        key, transform = canonicalize(grid)
+        solution_key = self.entries.get(key)
+        if solution_key is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return restore_solution(solution_key, transform)
+
+    def put(self, grid, solution):
+        """存入題目與其解答"""
+        key, transform = canonicalize(grid)
+        self.entries[key] = _to_canonical_solution(solution, transform)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def solve(self, grid, solve_func):
+        """先查詢快取，未命中時呼叫solve_func(grid)求解並存入；與solve(grid)相同會將解答寫回grid"""
+        cached = self.get(grid)
+        if cached is not None:
+            for i in range(9):
+                grid[i][:] = cached[i]
+            return True
+        puzzle = [row[:] for row in grid]
+        if not solve_func(grid):
+            return False
+        self.put(puzzle, grid)
+        return True
+
+    def stats(self):
+        """返回快取命中統計"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def load(self):
+        """從磁碟載入快取內容"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for key, solution_key in json.load(f).items():
+                        self.entries[key] = solution_key
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        except Exception as e:
+            print(f"載入解答快取失敗: {e}")
+
+    def save(self):
+        """將快取內容保存至磁碟（依使用順序，最近使用的在最後）"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+        except Exception as e:
+            print(f"儲存解答快取失敗: {e}")
@@ -0,0 +1,543 @@
+import sys
+import time
+
+ALL_DIGITS = 0x1FF                                         # 9個位元全部為1，代表1~9皆為候選
+BIT_COUNT = [bin(mask).count('1') for mask in range(512)]  # 各遮罩的候選數量查表
+BIT_DIGIT = {1 << (num - 1): num for num in range(1, 10)}  # 單一位元對應的數字
+
+# 預先計算每個格子所屬的行、列、方格索引
+ROW_OF = [idx // 9 for idx in range(81)]
+COL_OF = [idx % 9 for idx in range(81)]
+BOX_OF = [(idx // 27) * 3 + (idx % 9) // 3 for idx in range(81)]
+
+# 27個單位（9行、9列、9方格），每個單位包含9個格子索引
+UNITS = ([[r * 9 + c for c in range(9)] for r in range(9)] +
+         [[r * 9 + c for r in range(9)] for c in range(9)] +
+         [[idx for idx in range(81) if BOX_OF[idx] == b] for b in range(9)])
+
+# 解題結果狀態
+SOLVED = 'solved'
+UNSOLVABLE = 'unsolvable'
+BUDGET_EXCEEDED = 'budget_exceeded'
+
+
+class BudgetExceeded(Exception):
+    """搜尋超過節點數或時間預算，args[0]為 'nodes' 或 'time'"""
+
+
+class SearchBudget:
+    """各解題引擎共用的搜尋統計與預算限制
+
+    nodes 為搜尋節點數，backtracks 為失敗後撤回的分支數，propagations 為約束更新次數
+    （backtrack：放入數字；bitmask：唯一候選/隱藏唯一推導填入的格子；dlx：覆蓋的約束欄）。
+    max_nodes、max_time（秒）為None表示不限制；超過預算時 solve() 返回False且 status 為 BUDGET_EXCEEDED。
+    """
+    def __init__(self, max_nodes=None, max_time=None):
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.status = None
+        self.exceeded = None                       # 超過的預算種類
+        self.nodes = self.backtracks = self.propagations = 0
+        self.elapsed = 0.0
+        self._deadline = None
+
+    def _visit(self):
+        """進入一個搜尋節點，超過預算時拋出BudgetExceeded（時間每256個節點檢查一次）"""
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded('nodes')
+        if self._deadline is not None and not self.nodes & 0xFF and time.perf_counter() > self._deadline:
+            raise BudgetExceeded('time')
+
+    def _run(self, search, *args):
+        """重設統計後執行搜尋，返回搜尋結果；超過預算時拋出BudgetExceeded"""
+        self.nodes = self.backtracks = self.propagations = 0
+        self.exceeded = None
+        start = time.perf_counter()
+        self._deadline = start + self.max_time if self.max_time is not None else None
+        try:
+            return search(*args)
+        except BudgetExceeded as e:
+            self.exceeded = e.args[0]
+            raise
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def _solve(self, search, *args):
+        """執行求解搜尋並設定status，返回是否找到解答"""
+        try:
+            solved = self._run(search, *args)
+        except BudgetExceeded:
+            self.status = BUDGET_EXCEEDED
+            return False
+        self.status = SOLVED if solved else UNSOLVABLE
+        return solved
+
+    def stats(self):
+        """返回最近一次搜尋的統計"""
+        return {
+            'status': self.status,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'propagations': self.propagations,
+            'elapsed_ms': round(self.elapsed * 1000, 3),
+            'exceeded': self.exceeded,
+        }
+
+
+class SudokuSolver(SearchBudget):
+    """數獨解題器類別，使用優化的約束傳播和啟發式算法"""
+    def __init__(self, max_nodes=None, max_time=None):
+        super().__init__(max_nodes, max_time)
+        self.rows = [set() for _ in range(9)]      # 跟踪每行已使用的數字
+        self.cols = [set() for _ in range(9)]      # 跟踪每列已使用的數字
+        self.boxes = [set() for _ in range(9)]     # 跟踪每個3x3方格已使用的數字
+        self.empty_cells = []                      # 儲存所有空格子的位置
+
+    def initialize_constraints(self, grid):
+        """初始化約束條件和空格子列表"""
+        for i in range(9):
+            for j in range(9):
+                if grid[i][j] != 0:
+                    num = grid[i][j]
+                    self.rows[i].add(num)
+                    self.cols[j].add(num)
+                    self.boxes[(i // 3) * 3 + j // 3].add(num)
+                else:
+                    self.empty_cells.append((i, j))
+
+        # 按照可能的候選數字數量排序空格子（啟發式）
+        self.empty_cells.sort(key=lambda pos: self._count_candidates(grid, pos))
+
+    def _count_candidates(self, grid, pos):
+        """計算一個空格子可能的候選數字數量"""
+        i, j = pos
+        box_idx = (i // 3) * 3 + j // 3
+        used = self.rows[i] | self.cols[j] | self.boxes[box_idx]
+        return sum(1 for num in range(1, 10) if num not in used)
+
+    def is_valid(self, num, pos):
+        """檢查在指定位置放置數字是否有效"""
+        i, j = pos
+        box_idx = (i // 3) * 3 + j // 3
+        return (num not in self.rows[i] and
+                num not in self.cols[j] and
+                num not in self.boxes[box_idx])
+
+    def solve(self, grid):
+        """解決數獨，成功時將解答寫回grid；無解或超過預算時grid保持不變"""
+        work = [row[:] for row in grid]            # 在副本上搜尋，中途停止時不留下猜測的數字
+        self.initialize_constraints(work)
+        if not self._solve(self._backtrack, work, 0):
+            return False
+        for i in range(9):
+            grid[i][:] = work[i]
+        return True
+
+    def _backtrack(self, grid, idx):
+        """回溯算法"""
+        self._visit()
+        if idx >= len(self.empty_cells):
+            return True
+
+        i, j = self.empty_cells[idx]
+        box_idx = (i // 3) * 3 + j // 3
+
+        # 使用約束條件快速找出候選數字
+        candidates = [num for num in range(1, 10) if self.is_valid(num, (i, j))]
+
+        for num in candidates:
+            # 放置數字並更新約束
+            grid[i][j] = num
+            self.rows[i].add(num)
+            self.cols[j].add(num)
+            self.boxes[box_idx].add(num)
+            self.propagations += 1
+
+            # 繼續解下一個空格子
+            if self._backtrack(grid, idx + 1):
+                return True
+
+            # 回溯
+            self.backtracks += 1
+            grid[i][j] = 0
+            self.rows[i].remove(num)
+            self.cols[j].remove(num)
+            self.boxes[box_idx].remove(num)
+
+        return False
+
+
+class BitmaskSolver(SearchBudget):
+    """位元遮罩解題器，以9位元整數儲存候選數字，並結合唯一候選/隱藏唯一推導與最少候選優先搜尋"""
+    def __init__(self, max_nodes=None, max_time=None):
+        super().__init__(max_nodes, max_time)
+        self.cells = [0] * 81                      # 以一維陣列儲存81個格子的數字
+        self.rows = [0] * 9                        # 每行已使用數字的位元遮罩
+        self.cols = [0] * 9                        # 每列已使用數字的位元遮罩
+        self.boxes = [0] * 9                       # 每個3x3方格已使用數字的位元遮罩
+
+    def initialize_constraints(self, grid):
+        """初始化位元遮罩，題目本身有衝突時返回False"""
+        for i in range(9):
+            for j in range(9):
+                num = grid[i][j]
+                if num == 0:
+                    continue
+                idx = i * 9 + j
+                if not self._candidates(idx) & (1 << (num - 1)):
+                    return False
+                self._place(idx, 1 << (num - 1))
+        return True
+
+    def _candidates(self, idx):
+        """計算格子目前的候選位元遮罩"""
+        return ALL_DIGITS & ~(self.rows[ROW_OF[idx]] | self.cols[COL_OF[idx]] | self.boxes[BOX_OF[idx]])
+
+    def _place(self, idx, bit):
+        """在格子放入數字並更新行、列、方格的遮罩"""
+        self.cells[idx] = BIT_DIGIT[bit]
+        self.rows[ROW_OF[idx]] |= bit
+        self.cols[COL_OF[idx]] |= bit
+        self.boxes[BOX_OF[idx]] |= bit
+
+    def _propagate(self):
+        """反覆套用唯一候選與隱藏唯一推導，發現矛盾時返回False"""
+        cells = self.cells
+        while True:
+            progress = False
+
+            # 唯一候選：格子只剩一個可能的數字
+            for idx in range(81):
+                if cells[idx]:
+                    continue
+                cand = self._candidates(idx)
+                if not cand:
+                    return False
+                if not cand & (cand - 1):
+                    self._place(idx, cand)
+                    self.propagations += 1
+                    progress = True
+
+            # 隱藏唯一：某數字在單位中只剩一個格子可放
+            for unit in UNITS:
+                once = twice = placed = 0
+                for idx in unit:
+                    if cells[idx]:
+                        placed |= 1 << (cells[idx] - 1)
+                        continue
+                    cand = self._candidates(idx)
+                    twice |= once & cand
+                    once |= cand
+                if (once | placed) != ALL_DIGITS:
+                    return False
+                hidden = once & ~twice
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for idx in unit:
+                        if not cells[idx] and self._candidates(idx) & bit:
+                            self._place(idx, bit)
+                            self.propagations += 1
+                            progress = True
+                            break
+                    else:
+                        return False
+
+            if not progress:
+                return True
+
+    def solve(self, grid):
+        """解決數獨，成功時將解答寫回grid"""
+        if not self.initialize_constraints(grid):
+            self.status = UNSOLVABLE
+            return False
+        if not self._solve(self._search):
+            return False
+        for idx in range(81):
+            grid[ROW_OF[idx]][COL_OF[idx]] = self.cells[idx]
+        return True
+
+    def _search(self):
+        """推導後選擇候選數最少的格子進行分支搜尋"""
+        self._visit()
+        if not self._propagate():
+            return False
+
+        best_idx, best_count, best_cand = -1, 10, 0
+        for idx in range(81):
+            if self.cells[idx]:
+                continue
+            cand = self._candidates(idx)
+            count = BIT_COUNT[cand]
+            if count < best_count:
+                best_idx, best_count, best_cand = idx, count, cand
+                if count == 2:
+                    break
+        if best_idx < 0:
+            return True
+
+        # 保存狀態以便回溯
+        saved = (self.cells[:], self.rows[:], self.cols[:], self.boxes[:])
+        while best_cand:
+            bit = best_cand & -best_cand
+            best_cand ^= bit
+            self._place(best_idx, bit)
+            if self._search():
+                return True
+            self.backtracks += 1
+            self.cells[:], self.rows[:], self.cols[:], self.boxes[:] = saved
+        return False
+
+
+def _build_cover_matrix():
+    """建立數獨精確覆蓋矩陣的舞蹈鏈結陣列（324個約束欄、729個候選列）"""
+    size = 325 + 729 * 4
+    left, right = [0] * size, [0] * size
+    up, down = [0] * size, [0] * size
+    column, row_id = [0] * size, [0] * size
+    col_size = [0] * 325
+
+    # 節點0為根節點，1~324為欄標頭
+    for i in range(325):
+        left[i], right[i] = i - 1, i + 1
+        up[i] = down[i] = column[i] = i
+    left[0], right[324] = 324, 0
+
+    node = 325
+    for rid in range(729):
+        idx, d = divmod(rid, 9)
+        r, c = ROW_OF[idx], COL_OF[idx]
+        # 格子、行-數字、列-數字、方格-數字 四種約束
+        cols = (1 + idx, 82 + r * 9 + d, 163 + c * 9 + d, 244 + BOX_OF[idx] * 9 + d)
+        first = node
+        for k, col in enumerate(cols):
+            column[node], row_id[node] = col, rid
+            up[node], down[node] = up[col], col
+            down[up[col]] = node
+            up[col] = node
+            col_size[col] += 1
+            left[node] = node - 1 if k else first + 3
+            right[node] = node + 1 if k < 3 else first
+            node += 1
+    return left, right, up, down, column, row_id, col_size
+
+
+class DLXSolver(SearchBudget):
+    """舞蹈鏈結（Knuth Algorithm X）精確覆蓋解題器，每次選擇節點最少的約束欄分支"""
+    _template = None                           # 共用的初始矩陣，每次解題時複製
+
+    def __init__(self, max_nodes=None, max_time=None):
+        super().__init__(max_nodes, max_time)
+        if DLXSolver._template is None:
+            DLXSolver._template = _build_cover_matrix()
+        (left, right, up, down, column, row_id, col_size) = DLXSolver._template
+        self.left, self.right = left[:], right[:]
+        self.up, self.down = up[:], down[:]
+        self.column, self.row_id = column, row_id   # 搜尋中不會修改，可共用
+        self.col_size = col_size[:]
+        self.solution = []                         # 已選擇的候選列編號
+
+    def _cover(self, col):
+        """將約束欄及與其衝突的候選列自矩陣移除"""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, col_size = self.column, self.col_size
+        right[left[col]], left[right[col]] = right[col], left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]], up[down[j]] = down[j], up[j]
+                col_size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, col):
+        """以相反順序還原被移除的約束欄"""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, col_size = self.column, self.col_size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                col_size[column[j]] += 1
+                down[up[j]] = up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = left[right[col]] = col
+
+    def initialize_constraints(self, grid):
+        """將題目給定的數字預先選入解答，題目本身有衝突時返回False"""
+        covered = set()
+        for i in range(9):
+            for j in range(9):
+                num = grid[i][j]
+                if num == 0:
+                    continue
+                node = 325 + ((i * 9 + j) * 9 + num - 1) * 4
+                cols = [self.column[node + k] for k in range(4)]
+                if covered.intersection(cols):
+                    return False
+                covered.update(cols)
+                for col in cols:
+                    self._cover(col)
+                self.solution.append(self.row_id[node])
+        return True
+
+    def solve(self, grid):
+        """解決數獨，成功時將解答寫回grid"""
+        if not self.initialize_constraints(grid):
+            self.status = UNSOLVABLE
+            return False
+        if not self._solve(self._search):
+            return False
+        for rid in self.solution:
+            idx, d = divmod(rid, 9)
+            grid[ROW_OF[idx]][COL_OF[idx]] = d + 1
+        return True
+
+    def _search(self):
+        """Algorithm X 遞迴搜尋"""
+        self._visit()
+        right, down, col_size = self.right, self.down, self.col_size
+        if right[0] == 0:
+            return True
+
+        # 選擇剩餘候選列最少的約束欄
+        col = right[0]
+        best, best_size = col, col_size[col]
+        while col and best_size > 1:
+            if col_size[col] < best_size:
+                best, best_size = col, col_size[col]
+            col = right[col]
+        if best_size == 0:
+            return False
+
+        self._cover(best)
+        i = down[best]
+        while i != best:
+            self.solution.append(self.row_id[i])
+            j = right[i]
+            while j != i:
+                self._cover(self.column[j])
+                j = right[j]
+            self.propagations += 4
+            if self._search():
+                return True
+            self.backtracks += 1
+            j = self.left[i]
+            while j != i:
+                self._uncover(self.column[j])
+                j = self.left[j]
+            self.solution.pop()
+            i = down[i]
+        self._uncover(best)
+        return False
+
+    def count_solutions(self, grid, limit=2):
+        """計算解答數量，達到limit即停止搜尋；不會修改grid，超過預算時拋出BudgetExceeded"""
+        if not self.initialize_constraints(grid):
+            return 0
+        return self._run(self._count, limit)
+
+    def _count(self, limit):
+        """Algorithm X 計數搜尋，最多計算到limit組解"""
+        self._visit()
+        right, down, col_size = self.right, self.down, self.col_size
+        if right[0] == 0:
+            return 1
+
+        col = right[0]
+        best, best_size = col, col_size[col]
+        while col and best_size > 1:
+            if col_size[col] < best_size:
+                best, best_size = col, col_size[col]
+            col = right[col]
+        if best_size == 0:
+            return 0
+
+        total = 0
+        self._cover(best)
+        i = down[best]
+        while i != best and total < limit:
+            j = right[i]
+            while j != i:
+                self._cover(self.column[j])
+                j = right[j]
+            self.propagations += 4
+            total += self._count(limit - total)
+            j = self.left[i]
+            while j != i:
+                self._uncover(self.column[j])
+                j = self.left[j]
+            i = down[i]
+        self._uncover(best)
+        return total
+
+
+# 可供選擇的解題引擎
+SOLVERS = {
+    'backtrack': SudokuSolver,
+    'bitmask': BitmaskSolver,
+    'dlx': DLXSolver,
+}
+DEFAULT_SOLVER = 'bitmask'
+
+
+def create_solver(name=DEFAULT_SOLVER, max_nodes=None, max_time=None):
+    """依名稱建立解題引擎，可設定搜尋節點數與時間（秒）預算"""
+    if name not in SOLVERS:
+        raise ValueError(f"未知的解題引擎: {name}，可用: {', '.join(SOLVERS)}")
+    return SOLVERS[name](max_nodes, max_time)
+
+
+def count_solutions(grid, limit=2, max_nodes=None, max_time=None):
+    """以舞蹈鏈結計算題目的解答數量，達到limit即提早停止（limit=2可判斷是否唯一解）
+
+    設定預算時，超過預算會拋出BudgetExceeded。
+    """
+    return DLXSolver(max_nodes, max_time).count_solutions(grid, limit)
+
+
+def parse_puzzle(line):
+    """將81字元的題目字串轉換為9x9網格，'0'與'.'表示空格"""
+    line = line.strip()
+    if len(line) != 81:
+        raise ValueError(f"題目長度必須為81字元: {line!r}")
+    digits = [0 if ch in '0.' else int(ch) for ch in line]
+    return [digits[i * 9:(i + 1) * 9] for i in range(9)]
+
+
+def read_puzzles(stream):
+    """從文字串流逐行讀取題目字串，略過空行與#開頭的註解
+
+    每行取最後一個欄位，因此也能讀取「難度 名稱 題目」格式的題庫（datasets/benchmark/puzzles.txt）。
+    """
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line.split()[-1]
+
+
+def format_grid(grid):
+    """將9x9網格轉換為81字元字串"""
+    return ''.join(str(num) for row in grid for num in row)
+
+
+def compare_solvers(puzzles, names=None):
+    """在固定題庫上比較各解題引擎的總耗時（秒）"""
+    timings = {}
+    for name in names or SOLVERS:
+        start = time.perf_counter()
+        for puzzle in puzzles:
+            create_solver(name).solve([row[:] for row in puzzle])
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+if __name__ == "__main__":
+    # 用法: python solver.py puzzles.txt [引擎名稱...]
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        puzzles = [parse_puzzle(line) for line in read_puzzles(f)]
+    for name, elapsed in compare_solvers(puzzles, sys.argv[2:]).items():
+        print(f"{name}: {len(puzzles)} 題 {elapsed:.3f} 秒")
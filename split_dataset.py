@@ -1,7 +1,15 @@
+import argparse
+import hashlib
 import os
-import random
 import shutil
 
+from screenshot_writer import IMAGE_EXTENSIONS
+
+# 放置方式：copy 複製檔案；hardlink/symlink 建立連結（不佔額外空間）；manifest 只寫出圖片清單
+SPLIT_MODES = ('hardlink', 'symlink', 'copy', 'manifest')
+DATASET_DIR = 'datasets'
+SPLITS = ('train', 'valid')
+
 def create_directory_structure():
     """創建所需的目錄結構"""
     directories = [
@@ -18,8 +26,8 @@ def get_all_files():
     files = []
     # 處理img目錄
     if os.path.exists('img'):
-        for file in os.listdir('img'):
-            if file.endswith('.png'):
+        for file in sorted(os.listdir('img')):
+            if file.lower().endswith(IMAGE_EXTENSIONS):
                 base_name = os.path.splitext(file)[0]
                 img_path = os.path.join('img', file)
                 label_path = os.path.join('img', base_name + '.txt')
@@ -27,48 +35,152 @@ def get_all_files():
                     files.append((img_path, label_path))
     return files
 
-def split_dataset(files, train_ratio=0.8):
-    """將文件分為訓練集和驗證集"""
-    random.shuffle(files)  # 隨機打亂文件順序
-    split_idx = int(len(files) * train_ratio)
-    return files[:split_idx], files[split_idx:]
+def split_key(name):
+    """將名稱雜湊為0~1之間的固定數值，同一名稱每次都分到同一組"""
+    digest = hashlib.sha1(name.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+def split_dataset(files, train_ratio=0.8, groups=None):
+    """依檔名雜湊將文件分為訓練集和驗證集（結果固定，新增檔案不影響既有檔案的分組）
+
+    groups 為 {圖片檔名: 群組鍵} 時改以群組鍵雜湊，同一群組必定分到同一組。
+    """
+    groups = groups or {}
+    train_files, valid_files = [], []
+    for pair in files:
+        name = os.path.basename(pair[0])
+        if split_key(groups.get(name, name)) < train_ratio:
+            train_files.append(pair)
+        else:
+            valid_files.append(pair)
+    return train_files, valid_files
+
+def _same_file(src, dst, mode):
+    """目的檔案是否已是來源的最新副本或連結"""
+    if not os.path.lexists(dst):
+        return False
+    if mode == 'hardlink':
+        return os.path.exists(dst) and os.path.samefile(src, dst)
+    if mode == 'symlink':
+        return os.path.islink(dst) and os.path.realpath(dst) == os.path.realpath(src)
+    src_stat, dst_stat = os.stat(src), os.stat(dst)
+    return src_stat.st_size == dst_stat.st_size and int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+
+def place_file(src, dst, mode):
+    """以指定方式放置檔案，已是最新時不處理並返回False；無法建立連結時改為複製"""
+    if _same_file(src, dst, mode):
+        return False
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        if mode == 'hardlink':
+            os.link(src, dst)
+        elif mode == 'symlink':
+            os.symlink(os.path.abspath(src), dst)
+        else:
+            shutil.copy2(src, dst)
+    except OSError as e:
+        # 跨磁碟無法建立硬連結、Windows未開啟權限無法建立符號連結
+        print("警告", f"無法建立{mode}，改為複製 {src}: {str(e)}")
+        shutil.copy2(src, dst)
+    return True
 
-def copy_files(files, is_train=True):
-    """將文件複製到相應的目錄"""
+def copy_files(files, is_train=True, mode='copy'):
+    """將文件放置到相應的目錄，返回實際新增或更新的文件對數量"""
     base_dir = 'datasets/train' if is_train else 'datasets/valid'
-    
+    other_dir = 'datasets/valid' if is_train else 'datasets/train'
+    placed = 0
+
     for img_path, label_path in files:
-        # 複製圖片
-        dst_img = os.path.join(base_dir, 'images', os.path.basename(img_path))
-        shutil.copy2(img_path, dst_img)
-        
-        # 複製標籤
-        dst_label = os.path.join(base_dir, 'labels', os.path.basename(label_path))
-        shutil.copy2(label_path, dst_label)
+        changed = False
+        for src, sub in ((img_path, 'images'), (label_path, 'labels')):
+            name = os.path.basename(src)
+            changed |= place_file(src, os.path.join(base_dir, sub, name), mode)
+            # 分割比例改變時，移除留在另一組的舊檔案
+            stale = os.path.join(other_dir, sub, name)
+            if os.path.lexists(stale):
+                os.remove(stale)
+        placed += changed
+    return placed
+
+def remove_duplicates(names):
+    """從訓練集與驗證集目錄移除先前放入、現在判定為重複的截圖"""
+    removed = 0
+    for split in SPLITS:
+        for name in names:
+            base_name = os.path.splitext(name)[0]
+            for path in (os.path.join(DATASET_DIR, split, 'images', name),
+                         os.path.join(DATASET_DIR, split, 'labels', base_name + '.txt')):
+                if os.path.lexists(path):
+                    os.remove(path)
+                    removed += 1
+    return removed
+
+def write_manifests(train_files, valid_files, dataset_dir=DATASET_DIR, base_yaml='data.yaml', prefix=''):
+    """寫出Ultralytics格式的圖片清單（train.txt、valid.txt）與對應的資料集設定檔，不複製任何檔案
+
+    清單中的路徑以 ./ 開頭，由Ultralytics相對於清單所在資料夾解析；標籤與圖片位於同一資料夾，
+    或依Ultralytics的規則位於對應的labels資料夾。prefix 用於另存子集清單（例如 smoke_train.txt）。
+    """
+    for split, files in zip(SPLITS, (train_files, valid_files)):
+        with open(os.path.join(dataset_dir, f"{prefix}{split}.txt"), 'w', encoding='utf-8') as f:
+            for img_path, _ in files:
+                f.write('./' + os.path.relpath(img_path, dataset_dir).replace(os.sep, '/') + '\n')
+
+    # 沿用data.yaml的類別設定，只替換訓練與驗證路徑
+    lines = [f"train: {prefix}train.txt", f"val: {prefix}valid.txt"]
+    with open(os.path.join(dataset_dir, base_yaml), 'r', encoding='utf-8') as f:
+        lines += [line.rstrip('\n') for line in f if line.split(':')[0].strip() not in ('train', 'val', 'test')]
+    yaml_path = os.path.join(dataset_dir, f"data_{prefix}manifest.yaml")
+    with open(yaml_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines).strip('\n') + '\n')
+    return yaml_path
 
 def main():
-    # 設置隨機種子以確保結果可重現
-    random.seed(42)
-    
-    # 創建目錄結構
-    create_directory_structure()
-    
+    parser = argparse.ArgumentParser(description="將img資料夾中已標註的截圖分為訓練集與驗證集")
+    parser.add_argument('--mode', default='hardlink', choices=SPLIT_MODES,
+                        help="hardlink/symlink建立連結、copy複製檔案、manifest只寫出圖片清單")
+    parser.add_argument('--train-ratio', type=float, default=0.8, help="訓練集比例")
+    parser.add_argument('--dedup', action='store_true', help="以感知雜湊去除重複截圖，同一群不會分到不同組")
+    parser.add_argument('--dedup-threshold', type=int, default=None, help="視為重複的漢明距離上限")
+    parser.add_argument('--keep', type=int, default=1, help="去除重複時每群保留的圖片數")
+    args = parser.parse_args()
+
     # 獲取所有文件
     all_files = get_all_files()
     print(f"總共找到 {len(all_files)} 對圖片和標籤文件")
-    
-    # 分割數據集
-    train_files, valid_files = split_dataset(all_files)
+
+    groups = None
+    duplicates = set()
+    if args.dedup:
+        from dedup_dataset import DEFAULT_THRESHOLD, dedup_directory
+        threshold = args.dedup_threshold if args.dedup_threshold is not None else DEFAULT_THRESHOLD
+        groups, duplicates, _ = dedup_directory('img', threshold, args.keep,
+                                                [os.path.basename(img) for img, _ in all_files])
+        all_files = [pair for pair in all_files if os.path.basename(pair[0]) in groups]
+
+    # 分割數據集（依檔名或群組雜湊，重複執行結果相同）
+    train_files, valid_files = split_dataset(all_files, args.train_ratio, groups)
     print(f"訓練集: {len(train_files)} 對文件")
     print(f"驗證集: {len(valid_files)} 對文件")
-    
-    # 複製文件到相應目錄
-    print("正在複製訓練集文件...")
-    copy_files(train_files, is_train=True)
-    print("正在複製驗證集文件...")
-    copy_files(valid_files, is_train=False)
-    
-    print("數據集分割完成！")
+
+    if args.mode == 'manifest':
+        yaml_path = write_manifests(train_files, valid_files)
+        print(f"已寫出圖片清單，訓練時使用 {yaml_path}")
+        return
+
+    # 創建目錄結構
+    create_directory_structure()
+    if duplicates:
+        print(f"已從數據集移除 {remove_duplicates(duplicates)} 個重複的檔案")
+
+    # 只放置新增或變更的文件
+    print(f"正在放置訓練集文件（{args.mode}）...")
+    placed = copy_files(train_files, is_train=True, mode=args.mode)
+    print(f"正在放置驗證集文件（{args.mode}）...")
+    placed += copy_files(valid_files, is_train=False, mode=args.mode)
+
+    print(f"數據集分割完成！新增或更新 {placed} 對文件")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,14 +1,179 @@
-from ultralytics import YOLO
-#訓練模型 資料在dataset資料夾下
-model = YOLO('sudoku.pt')
+import argparse
+import os
+import time
 
-if __name__ == '__main__':
-  # Train the model
-  results = model.train(
-    data='./datasets/data.yaml',
-    epochs=1000, 
-    batch=4, 
-    imgsz=480,
-    device="0",
-  )
+from screenshot_writer import IMAGE_EXTENSIONS
+#訓練模型 資料在dataset資料夾下 依硬體自動選擇裝置、批次大小、圖片快取與資料載入執行緒
+
+DATASET_DIR = 'datasets'
+DEFAULT_DATA = './datasets/data.yaml'
+
+# 訓練設定檔：default 為完整訓練；smoke 以CPU在少量圖片上訓練數輪，幾分鐘內完成，用於確認環境與數據集
+PROFILES = {
+    'default': {'epochs': 1000, 'imgsz': 480, 'patience': 50, 'subset': None},
+    'smoke': {'epochs': 3, 'imgsz': 320, 'patience': 0, 'subset': (32, 8), 'device': 'cpu', 'batch': 8,
+              'cache': 'ram', 'plots': False},
+}
+CPU_BATCH = 4                              # CPU與MPS使用固定的小批次
+MAX_WORKERS = 8
+
+
+def detect_device():
+    """依序偵測CUDA、Apple MPS，都沒有時使用CPU"""
+    import torch
+    if torch.cuda.is_available():
+        return '0'
+    mps = getattr(torch.backends, 'mps', None)
+    if mps is not None and mps.is_available():
+        return 'mps'
+    return 'cpu'
+
+
+def auto_batch(device):
+    """GPU交給Ultralytics依顯示記憶體自動決定（batch=-1，約使用60%），CPU與MPS使用固定批次"""
+    if device not in ('cpu', 'mps'):
+        return -1
+    return CPU_BATCH
+
+
+def auto_workers(device):
+    """資料載入執行緒數：保留一個核心給訓練主程式，最多MAX_WORKERS個；CPU訓練時運算本身已佔用各核心，最多2個"""
+    cpus = os.cpu_count() or 1
+    limit = 2 if device == 'cpu' else MAX_WORKERS
+    return max(0, min(limit, cpus - 1))
+
+
+def available_memory():
+    """可用記憶體（位元組），無法取得時返回None"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def auto_cache(image_count, imgsz):
+    """估計快取縮放後圖片所需的記憶體，不超過可用記憶體一半時快取到RAM，否則快取到磁碟（.npy）"""
+    memory = available_memory()
+    if not image_count or memory is None:
+        return 'disk'
+    needed = image_count * imgsz * imgsz * 3
+    return 'ram' if needed * 2 < memory else 'disk'
+
+
+def dataset_images(split, dataset_dir=DATASET_DIR):
+    """列出分割後的圖片：優先使用 datasets/<split>/images，沒有時讀取 datasets/<split>.txt 圖片清單"""
+    image_dir = os.path.join(dataset_dir, split, 'images')
+    if os.path.isdir(image_dir):
+        images = sorted(os.path.join(image_dir, name) for name in os.listdir(image_dir)
+                        if name.lower().endswith(IMAGE_EXTENSIONS))
+        if images:
+            return images
+    manifest = os.path.join(dataset_dir, f"{split}.txt")
+    if not os.path.exists(manifest):
+        return []
+    with open(manifest, 'r', encoding='utf-8') as f:
+        return [os.path.normpath(os.path.join(dataset_dir, line.strip())) for line in f if line.strip()]
+
+
+def write_subset(train_count, valid_count, dataset_dir=DATASET_DIR):
+    """取訓練集與驗證集的前幾張圖片寫成子集清單，返回資料集設定檔路徑"""
+    from split_dataset import write_manifests
+    train_files = [(path, None) for path in dataset_images('train', dataset_dir)[:train_count]]
+    valid_files = [(path, None) for path in dataset_images('valid', dataset_dir)[:valid_count]]
+    if not train_files or not valid_files:
+        raise FileNotFoundError("找不到分割後的數據集，請先執行 split_dataset.py")
+    return write_manifests(train_files, valid_files, dataset_dir, prefix='smoke_')
 
+
+class ThroughputLogger:
+    """以訓練回呼記錄每輪的訓練時間與每秒處理的圖片數"""
+    def __init__(self):
+        self.epoch_start = None
+        self.history = []                          # (輪次, 秒數, 張/秒)
+
+    def on_train_epoch_start(self, trainer):
+        self.epoch_start = time.perf_counter()
+
+    def on_train_epoch_end(self, trainer):
+        if self.epoch_start is None:
+            return
+        elapsed = time.perf_counter() - self.epoch_start
+        images = len(trainer.train_loader.dataset)
+        rate = images / elapsed if elapsed > 0 else 0.0
+        self.history.append((trainer.epoch + 1, elapsed, rate))
+        print(f"第 {trainer.epoch + 1} 輪：{images} 張圖片，{elapsed:.1f} 秒，{rate:.1f} 張/秒")
+
+    def attach(self, model):
+        model.add_callback('on_train_epoch_start', self.on_train_epoch_start)
+        model.add_callback('on_train_epoch_end', self.on_train_epoch_end)
+
+
+def resolve_options(args):
+    """合併設定檔與命令列參數，未指定的項目依硬體自動決定，返回model.train的參數"""
+    profile = PROFILES[args.profile]
+    options = {
+        'data': args.data or DEFAULT_DATA,
+        'epochs': args.epochs or profile['epochs'],
+        'imgsz': args.imgsz or profile['imgsz'],
+        'patience': args.patience if args.patience is not None else profile['patience'],
+        'device': args.device or profile.get('device') or detect_device(),
+    }
+    if profile['subset'] and args.data is None:
+        options['data'] = write_subset(*profile['subset'])
+
+    options['batch'] = args.batch or profile.get('batch') or auto_batch(options['device'])
+    options['workers'] = args.workers if args.workers is not None else auto_workers(options['device'])
+
+    cache = args.cache or profile.get('cache') or 'auto'
+    if cache == 'auto':
+        image_count = len(dataset_images('train')) + len(dataset_images('valid'))
+        cache = auto_cache(image_count, options['imgsz'])
+    options['cache'] = False if cache == 'off' else cache
+
+    if 'plots' in profile:
+        options['plots'] = profile['plots']
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description="訓練數獨數字辨識模型，未指定的參數依硬體自動決定")
+    parser.add_argument('--profile', default='default', choices=list(PROFILES),
+                        help="default完整訓練；smoke以CPU在少量圖片上快速試跑")
+    parser.add_argument('--model', default='sudoku.pt', help="起始權重")
+    parser.add_argument('--data', default=None, help=f"資料集設定檔（預設 {DEFAULT_DATA}，smoke預設為自動產生的子集清單）")
+    parser.add_argument('--epochs', type=int, default=None, help="訓練輪數")
+    parser.add_argument('--imgsz', type=int, default=None, help="輸入尺寸")
+    parser.add_argument('--batch', type=int, default=None, help="批次大小，-1由Ultralytics依顯示記憶體決定")
+    parser.add_argument('--device', default=None, help="裝置，例如 0、0,1、mps、cpu（預設自動偵測）")
+    parser.add_argument('--workers', type=int, default=None, help="資料載入執行緒數（預設CPU核心數-1，最多8）")
+    parser.add_argument('--cache', default=None, choices=['auto', 'ram', 'disk', 'off'],
+                        help="圖片快取：auto依可用記憶體選擇ram或disk")
+    parser.add_argument('--patience', type=int, default=None, help="驗證指標連續幾輪沒有進步就提前停止，0為不停止")
+    parser.add_argument('--name', default=None, help="輸出資料夾名稱（runs/detect/<name>）")
+    args = parser.parse_args()
+
+    options = resolve_options(args)
+    if args.name:
+        options['name'] = args.name
+    print("訓練參數：" + "，".join(f"{key}={value}" for key, value in options.items()))
+
+    from ultralytics import YOLO
+    model = YOLO(args.model)
+    throughput = ThroughputLogger()
+    throughput.attach(model)
+
+    start = time.perf_counter()
+    model.train(**options)
+    elapsed = time.perf_counter() - start
+    if throughput.history:
+        rates = [rate for _, _, rate in throughput.history]
+        print(f"完成 {len(rates)} 輪，共 {elapsed:.0f} 秒，平均 {sum(rates) / len(rates):.1f} 張/秒")
+
+
+if __name__ == '__main__':
+    main()
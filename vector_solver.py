@@ -0,0 +1,129 @@
+import numpy as np
+
+from solver import BIT_COUNT, DEFAULT_SOLVER
+from batch_solve import solve_many
+
+DIGIT_BITS = (1 << np.arange(9)).astype(np.uint16)        # 數字1~9對應的位元
+POPCOUNT = np.array(BIT_COUNT, dtype=np.uint8)            # 候選數量查表
+DIGIT_OF = np.zeros(512, dtype=np.uint8)                  # 單一位元遮罩對應的數字
+DIGIT_OF[DIGIT_BITS] = np.arange(1, 10)
+BOX_INDEX = (np.arange(9)[:, None] // 3) * 3 + np.arange(9)[None, :] // 3  # 每個格子所屬方格
+
+# 傳播結果狀態
+INVALID, UNSOLVED, SOLVED = -1, 0, 1
+
+
+def to_boxes(a):
+    """將(N,9,9,...)的行列排列轉為(N,方格,方格內格子,...)排列；此轉換為自身的反函數"""
+    n, rest = a.shape[0], a.shape[3:]
+    return a.reshape(n, 3, 3, 3, 3, *rest).swapaxes(2, 3).reshape(n, 9, 9, *rest)
+
+
+def puzzles_to_candidates(puzzles):
+    """將81字元題目字串轉為(N,9,9)的uint16候選遮罩陣列，並返回格式是否正確的布林陣列"""
+    valid = np.array([len(p) == 81 and all(ch in '.0123456789' for ch in p) for p in puzzles], dtype=bool)
+    text = ''.join(p if ok else '0' * 81 for p, ok in zip(puzzles, valid))
+    digits = np.frombuffer(text.encode('ascii'), dtype=np.uint8).reshape(-1, 9, 9).astype(np.int16) - ord('0')
+    digits[digits < 0] = 0                                  # '.' 視為空格
+    cand = np.where(digits > 0, DIGIT_BITS[np.maximum(digits - 1, 0)], np.uint16(0x1FF))
+    return cand.astype(np.uint16), valid
+
+
+def candidates_to_strings(cand):
+    """將已確定的候選遮罩轉回81字元字串（未確定的格子輸出0）"""
+    digits = (DIGIT_OF[cand] + ord('0')).astype(np.uint8).reshape(-1, 81)
+    return [row.tobytes().decode('ascii') for row in digits]
+
+
+def _unit_counts(units):
+    """對(N,單位,格子)的候選遮罩逐格累計，返回出現至少一次與至少兩次的數字遮罩(N,單位)"""
+    once = np.zeros(units.shape[:2], dtype=np.uint16)
+    twice = np.zeros(units.shape[:2], dtype=np.uint16)
+    for k in range(9):
+        cell = units[:, :, k]
+        twice |= once & cell
+        once |= cell
+    return once, twice
+
+
+def _propagate_round(cand):
+    """對整批題目執行一輪唯一候選消去與隱藏唯一推導，返回新的候選遮罩與矛盾標記"""
+    fixed = POPCOUNT[cand] == 1
+    singles = np.where(fixed, cand, np.uint16(0))
+
+    # 唯一候選消去：從未確定格子移除同行、列、方格已確定的數字
+    row_or = np.bitwise_or.reduce(singles, axis=2)
+    col_or = np.bitwise_or.reduce(singles, axis=1)
+    box_or = np.bitwise_or.reduce(to_boxes(singles), axis=2)
+    peers = row_or[:, :, None] | col_or[:, None, :] | box_or[:, BOX_INDEX]
+    cand = np.where(fixed, cand, cand & ~peers)
+
+    # 已確定數字在同單位中重複即為矛盾（不同數字的數量少於已確定格子數）
+    invalid = ((POPCOUNT[row_or] < fixed.sum(axis=2, dtype=np.uint8)).any(axis=1) |
+               (POPCOUNT[col_or] < fixed.sum(axis=1, dtype=np.uint8)).any(axis=1) |
+               (POPCOUNT[box_or] < to_boxes(fixed).sum(axis=2, dtype=np.uint8)).any(axis=1))
+
+    # 隱藏唯一：某數字在單位中只出現在一個格子
+    row_once, row_twice = _unit_counts(cand)
+    col_once, col_twice = _unit_counts(cand.swapaxes(1, 2))
+    box_once, box_twice = _unit_counts(to_boxes(cand))
+    invalid |= (((row_once & col_once & box_once) != 0x1FF).any(axis=1) |
+                (cand == 0).any(axis=(1, 2)))
+    hidden = ((row_once & ~row_twice)[:, :, None] |
+              (col_once & ~col_twice)[:, None, :] |
+              (box_once & ~box_twice)[:, BOX_INDEX])
+    hidden_mask = cand & hidden
+    invalid |= (POPCOUNT[hidden_mask] > 1).any(axis=(1, 2))  # 同一格子必須同時為兩個數字
+    cand = np.where(hidden_mask != 0, hidden_mask, cand)
+    return cand, invalid
+
+
+def propagate(cand):
+    """重複推導直到每道題目都不再變化，返回候選遮罩與各題狀態（SOLVED/UNSOLVED/INVALID）"""
+    cand = cand.copy()
+    invalid = np.zeros(len(cand), dtype=bool)
+    active = np.arange(len(cand))
+    while len(active):
+        new, bad = _propagate_round(cand[active])
+        invalid[active[bad]] = True
+        changed = (new != cand[active]).any(axis=(1, 2)) & ~bad
+        cand[active] = new
+        active = active[changed]
+
+    status = np.where((POPCOUNT[cand] == 1).all(axis=(1, 2)), SOLVED, UNSOLVED)
+    status[invalid] = INVALID
+    return cand, status
+
+
+def solve_bulk(puzzles, solver_name=DEFAULT_SOLVER, batch_size=65536, processes=1):
+    """以向量化推導批次解題，依輸入順序逐一產生81字元解答（無解或格式錯誤為None）
+
+    每 batch_size 道題目組成一個 (N,9,9) 陣列一起推導，只有推導後仍需搜尋的題目
+    才交給 solve_many 以純量解題引擎處理。
+    """
+    batch = []
+    for puzzle in puzzles:
+        batch.append(puzzle)
+        if len(batch) >= batch_size:
+            yield from _solve_batch(batch, solver_name, processes)
+            batch = []
+    if batch:
+        yield from _solve_batch(batch, solver_name, processes)
+
+
+def _solve_batch(puzzles, solver_name, processes):
+    """推導一批題目，剩餘未解的題目改用純量引擎搜尋"""
+    cand, valid = puzzles_to_candidates(puzzles)
+    cand, status = propagate(cand)
+    status[~valid] = INVALID
+    strings = candidates_to_strings(cand)
+
+    pending = np.flatnonzero(status == UNSOLVED)
+    solved = dict(zip(pending.tolist(), solve_many([strings[i] for i in pending], solver_name, processes)))
+    for i, state in enumerate(status.tolist()):
+        if state == SOLVED:
+            yield strings[i]
+        elif state == UNSOLVED:
+            yield solved[i]
+        else:
+            yield None
@@ -0,0 +1,86 @@
+import threading
+
+THUMBNAIL_SIZE = (32, 32)                  # 比較畫面差異用的縮圖尺寸
+
+
+def grab_region(bbox):
+    """擷取螢幕指定區域"""
+    from PIL import ImageGrab
+    return ImageGrab.grab(bbox=bbox)
+
+
+def thumbnail(image):
+    """將畫面縮為灰階小圖，用於快速比較"""
+    from PIL import Image
+    return image.convert('L').resize(THUMBNAIL_SIZE, Image.BILINEAR)
+
+
+def frame_difference(a, b):
+    """計算兩張縮圖的平均灰階差（0~255）"""
+    from PIL import ImageChops, ImageStat
+    return ImageStat.Stat(ImageChops.difference(a, b)).mean[0]
+
+
+class BoardWatcher:
+    """定時擷取題目區域，只有畫面明顯改變且穩定後才觸發辨識
+
+    每次擷取只做縮圖比較；畫面與上次觸發時不同、且與前一張相同（已停止變化）時，
+    才呼叫 on_change(image)。is_busy() 為True時只更新基準畫面，避免自動填入造成的變化再次觸發。
+    """
+    def __init__(self, area_func, on_change, interval=0.5, threshold=4.0, grab_func=grab_region, is_busy=None):
+        self.area_func = area_func                 # 返回(x1, y1, x2, y2)的函數
+        self.on_change = on_change
+        self.interval = interval                   # 擷取間隔（秒）
+        self.threshold = threshold                 # 視為改變的平均灰階差
+        self.grab_func = grab_func
+        self.is_busy = is_busy or (lambda: False)
+        self.baseline = None                       # 上次觸發（或忙碌時）的畫面縮圖
+        self.previous = None                       # 前一次擷取的縮圖
+        self.frames = 0
+        self.triggers = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """啟動監看執行緒"""
+        if self._thread is not None:
+            return
+        # 每個執行緒使用各自的停止旗標，停止後可立即重新啟動
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name='watch', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        """停止監看；從Tk主執行緒呼叫時不可等待，監看執行緒可能正等待介面回應"""
+        self._stop.set()
+        if self._thread is not None and wait:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self, stop):
+        """監看迴圈"""
+        while not stop.wait(self.interval):
+            try:
+                self.check(self.grab_func(self.area_func()))
+            except Exception as e:
+                print("錯誤", f"監看擷取失敗: {str(e)}")
+
+    def check(self, image):
+        """比較一張擷取畫面，需要辨識時呼叫on_change並返回True"""
+        self.frames += 1
+        current = thumbnail(image)
+        previous, self.previous = self.previous, current
+
+        if self.is_busy():
+            self.baseline = current
+            return False
+        if self.baseline is not None and frame_difference(current, self.baseline) < self.threshold:
+            return False
+        # 畫面仍在變化（動畫、捲動中）時等待下一張
+        if previous is None or frame_difference(current, previous) >= self.threshold:
+            return False
+
+        self.baseline = current
+        self.triggers += 1
+        self.on_change(image)
+        return True